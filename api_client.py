@@ -0,0 +1,121 @@
+"""
+HTTP client for the FastAPI backend.
+
+With BACKEND_URL set, app.py generates reports through the backend's
+/recommend endpoints instead of calling Groq in-process. The Streamlit
+servers then hold neither the LLM latency nor the API key, and every
+frontend shares the backend's caches, rate scheduler and admission limits.
+
+One keep-alive requests.Session is shared per process, with a bounded
+connection pool and explicit connect/read timeouts. Failed connections and
+502/503/504 responses are retried with backoff (honouring Retry-After).
+That includes the POSTs: a report is a pure function of the profile and the
+backend caches and coalesces identical ones, so repeating one is safe. Read
+timeouts are not retried, so a slow upstream is not asked twice.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class BackendClient:
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 120.0,
+        pool_size: int = 32,
+        retries: int = 2,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, payload: dict, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(f"{self.base_url}{path}", json=payload, **kwargs)
+
+    def recommend(self, user_data: dict) -> Dict[str, Any]:
+        """
+        POST /recommend. Returns the backend's result, or {'report': 'Error: ...'}
+        like get_llm_recommendation when the backend cannot be reached.
+        """
+        try:
+            response = self._post("/recommend", user_data)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            return {"report": f"Error communicating with the backend: {e}"}
+
+    def stream(self, user_data: dict) -> Iterator[dict]:
+        """
+        POST /recommend/stream and yield its NDJSON events ('preview',
+        'section', then 'done' or 'error'). Backends without the streaming
+        endpoint are served by one /recommend call.
+        """
+        try:
+            with self._post("/recommend/stream", user_data, stream=True) as response:
+                if response.status_code in (404, 405):
+                    result = self.recommend(user_data)
+                    yield {"type": "error" if result["report"].startswith("Error") else "done", **result}
+                    return
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        except (requests.RequestException, ValueError) as e:
+            yield {"type": "error", "report": f"Error communicating with the backend: {e}"}
+
+    def peers(self, user_data: dict, salary_range: str) -> Optional[Dict[str, Any]]:
+        """
+        POST /stats/peers. None when there are too few peers, the backend has
+        no salary index or cannot be reached: the comparison is optional.
+        """
+        try:
+            response = self._post(
+                "/stats/peers",
+                {"user_data": user_data, "salary_range": salary_range},
+                timeout=(self.timeout[0], 5.0),
+            )
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError):
+            return None
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def client_from_env() -> Optional[BackendClient]:
+    """
+    A client for BACKEND_URL, or None to keep generating reports in-process.
+    """
+    base_url = os.getenv("BACKEND_URL")
+    if not base_url:
+        return None
+    return BackendClient(
+        base_url,
+        connect_timeout=float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3")),
+        read_timeout=float(os.getenv("BACKEND_READ_TIMEOUT", "120")),
+        pool_size=int(os.getenv("BACKEND_POOL_SIZE", "32")),
+        retries=int(os.getenv("BACKEND_RETRIES", "2")),
+    )
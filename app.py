@@ -1,34 +1,120 @@
 import streamlit as st
-import requests
+import functools
+import hashlib
 import re
 import os
-from groq import Groq
+import sys
+import threading
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
+# --- Shared helpers live in the backend package ---
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from llm_utils import (
+    COMPLETION_PARAMS, MODEL, get_llm_recommendation, indexed_report, record_retry, stream_llm_recommendation,
+)
+from report_cache import ReportCache, report_cache_key
+from canonical import canonicalize_profile
+from capture import get_capture
+from form_options import (
+    CAREER_GOALS, EDUCATION_LEVELS, LEARNING_STYLES, OTHER_LANGUAGES, POPULAR_LANGUAGES,
+    TIME_COMMITMENT_DEFAULT, TIME_COMMITMENT_MAX, TIME_COMMITMENT_MIN,
+)
+from prompt_engine import NXTWAVE_COURSES
+from groq_client import warm_up
+from prefetch import Prefetcher
+from sections import REQUIRED_SECTIONS, missing_sections, parse_sections
+
 # --- Load environment variables ---
 load_dotenv()
 
+SESSION_REPORT_CACHE_SIZE = 8
+
+# Start generating the report in the background once step 8 is submitted
+PREFETCH_REPORTS = os.getenv("PREFETCH_REPORTS", "1").lower() in ("1", "true", "yes")
+
+# Logo and font are served from this repo's static/ once fetch_assets.py has run;
+# until then the page links the original remote copies
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Where browsers fetch them: Streamlit's static serving by default, or the backend's
+# /static mount (e.g. https://api.example.com/static), which adds long-lived cache headers
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL", "app/static").rstrip("/")
+FONT_FILES = {400: "fonts/IBMPlexMono-Regular.woff2", 700: "fonts/IBMPlexMono-Bold.woff2"}
+LOGO_FILE = "logo.png"
+
+# Static page styles: IBM Plex Mono everywhere plus the report grid
+PAGE_CSS = """
+html, body, [class*="css"] { font-family: 'IBM Plex Mono', monospace !important; }
+.stButton>button, .stTextInput>div>input, .stTextArea textarea, .stSelectbox>div>div, .stMultiSelect>div>div, .stSlider>div {
+    font-family: 'IBM Plex Mono', monospace !important;
+}
+.ai-report-grid { display: flex; flex-wrap: wrap; gap: 24px; margin-bottom: 32px; }
+.ai-report-box {
+    background: #181c20; border-radius: 14px; box-shadow: 0 2px 12px #0004;
+    padding: 22px 20px 18px 20px; min-width: 280px; flex: 1 1 340px;
+    border: 2.5px solid #23272f; margin-bottom: 0; color: #f3f4f6;
+    font-family: 'IBM Plex Mono', monospace;
+}
+.ai-report-title { font-size: 1.13em; font-weight: 700; margin-bottom: 8px; display: flex; align-items: center; }
+.ai-report-icon { font-size: 1.35em; margin-right: 10px; }
+@media (max-width: 900px) {
+    .ai-report-grid { flex-direction: column; gap: 18px; }
+    .ai-report-box { min-width: 0; }
+}
+"""
+
+SECTION_ICONS = {
+    "Estimated Salary Range": "💰",
+    "Roles They Can Aim For": "🎯",
+    "Skills They're Missing": "🛠️",
+    "Suggested Learning Tracks": "📚",
+    "ROI of Upskilling": "📈",
+}
+SECTION_BORDERS = {
+    "Estimated Salary Range": "#6ee7b7",
+    "Roles They Can Aim For": "#7dd3fc",
+    "Skills They're Missing": "#fde68a",
+    "Suggested Learning Tracks": "#c4b5fd",
+    "ROI of Upskilling": "#fdba74",
+}
+
 # --- Branding and Theme ---
 st.set_page_config(page_title="Career & Salary Estimator – Powered by AI", layout="centered")
 
-# Add a logo/banner (replace with your logo path or URL)
-st.image("https://nxtwave.imgix.net/ccbp-website/ccbp_logo.png", width=180)
+@st.cache_data(show_spinner=False)
+def asset_url(name: str) -> Optional[str]:
+    """
+    URL of a file in static/, versioned by its content so it can be cached
+    for good, or None when the file is missing.
+    """
+    try:
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return None
+    return f"{ASSET_BASE_URL}/{name}?v={version}"
 
-# Inject IBM Plex Mono font via custom CSS
-st.markdown(
+@st.cache_data(show_spinner=False)
+def page_head_html() -> str:
     """
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=IBM+Plex+Mono:wght@400;700&display=swap');
-    html, body, [class*="css"]  {
-        font-family: 'IBM Plex Mono', monospace !important;
-    }
-    .stButton>button, .stTextInput>div>input, .stTextArea textarea, .stSelectbox>div>div, .stMultiSelect>div>div, .stSlider>div {
-        font-family: 'IBM Plex Mono', monospace !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+    The logo and one style block: the font faces, then PAGE_CSS. Assets
+    missing from static/ are loaded from their original hosts.
+    """
+    from fetch_assets import FONT_CSS_URL, LOGO_URL
+    fonts = {weight: asset_url(name) for weight, name in FONT_FILES.items()}
+    if all(fonts.values()):
+        faces = [
+            f"@font-face {{ font-family: 'IBM Plex Mono'; font-weight: {weight}; font-display: swap; "
+            f"src: url('{url}') format('woff2'); }}"
+            for weight, url in fonts.items()
+        ]
+    else:
+        faces = [f"@import url('{FONT_CSS_URL}');"]
+    logo = asset_url(LOGO_FILE) or LOGO_URL
+    return f'<img src="{logo}" width="180" alt="NxtWave"><style>' + "\n".join(faces) + PAGE_CSS + "</style>"
+
+st.markdown(page_head_html(), unsafe_allow_html=True)
 
 st.title("Career & Salary Estimator – Powered by AI")
 
@@ -45,6 +131,7 @@ def next_step():
     st.session_state.step += 1
 
 def reset():
+    get_prefetcher().discard(st.session_state.pop("prefetch", None))
     st.session_state.step = 1
     st.session_state.user_data = {}
     st.session_state.selected_popular_langs = set()
@@ -57,7 +144,7 @@ def step_education():
         st.header("Step 1: Your Highest Education Qualification")
         education = st.selectbox(
             "Select your highest qualification:",
-            ["High School", "Diploma", "Bachelor's Degree", "Master's Degree", "PhD", "Other"],
+            EDUCATION_LEVELS,
             help="This helps us tailor recommendations to your background."
         )
         submitted = st.form_submit_button("Next")
@@ -82,9 +169,7 @@ def step_experience():
 
 def step_tech_knowledge():
     st.header("Step 3: Previous Technical Knowledge")
-    popular_langs = [
-        "Python", "JavaScript", "Java", "C#", "C++", "TypeScript", "Go", "Ruby", "PHP", "SQL", "HTML/CSS"
-    ]
+    popular_langs = POPULAR_LANGUAGES
     if 'selected_popular_langs' not in st.session_state:
         st.session_state.selected_popular_langs = set()
     def toggle_lang(lang):
@@ -104,16 +189,14 @@ def step_tech_knowledge():
                     toggle_lang(lang)
     st.write("")
     st.write("**Or search and add any programming language(s):**")
-    all_langs = popular_langs + [
-        "Kotlin", "Swift", "Scala", "Rust", "Dart", "Perl", "MATLAB", "R", "Objective-C", "Shell", "Assembly", "Other"
-    ]
+    all_langs = popular_langs + OTHER_LANGUAGES
     custom_langs = st.multiselect(
         "Search or add languages:",
         options=sorted(set(all_langs)),
         default=list(st.session_state.selected_popular_langs),
         key="custom_langs"
     )
-    tech_knowledge = list(set(custom_langs) | st.session_state.selected_popular_langs)
+    tech_knowledge = sorted(set(custom_langs) | st.session_state.selected_popular_langs)
     with st.form(key="form3", clear_on_submit=False):
         submitted = st.form_submit_button("Next")
         if submitted:
@@ -143,7 +226,7 @@ def step_goal():
         st.header("Step 5: Your Career Goal")
         goal = st.selectbox(
             "What is your main career goal?",
-            ["Software Developer", "Data Analyst", "QA/Automation Tester", "Full Stack Developer", "Other"],
+            CAREER_GOALS,
             help="Choose the role you aspire to."
         )
         submitted = st.form_submit_button("Next")
@@ -171,7 +254,7 @@ def step_learning_style():
         st.header("Step 7: Preferred Learning Style")
         learning_style = st.radio(
             "Preferred learning style:",
-            ["Self-paced", "Instructor-led", "Hybrid", "No preference"],
+            LEARNING_STYLES,
             help="How do you prefer to learn?"
         )
         submitted = st.form_submit_button("Next")
@@ -185,12 +268,13 @@ def step_time_commitment():
         st.header("Step 8: Time Commitment")
         time_commitment = st.slider(
             "How many hours per week can you commit?",
-            min_value=1, max_value=40, value=10,
+            min_value=TIME_COMMITMENT_MIN, max_value=TIME_COMMITMENT_MAX, value=TIME_COMMITMENT_DEFAULT,
             help="This helps us recommend a realistic upskilling plan."
         )
         submitted = st.form_submit_button("Next")
         if submitted:
             st.session_state.user_data['time_commitment'] = time_commitment
+            start_prefetch(st.session_state.user_data)
             next_step()
             st.rerun()
 
@@ -233,83 +317,250 @@ def format_inr(amount):
     except Exception:
         return amount
 
-# --- LLM Recommendation Logic (moved from backend/llm_utils.py) ---
-def build_prompt(user_data: dict) -> str:
-    nxtwave_courses = [
-        "NxtWave MERN Stack Developer Course",
-        "NxtWave Full-Stack Developer Course",
-        "NxtWave Data Analytics Course",
-        "NxtWave QA/Automation Testing Course"
-    ]
-    return f"""
-    You are an expert career and salary advisor for IT students in India. Given the following user profile, generate a structured, concise, and actionable report. **You MUST ALWAYS return ALL of the following sections, even if you have to make reasonable assumptions.**
-    
-    Sections (use these exact headers):
-    1. Estimated Salary Range (in INR LPA, e.g., '₹6–10 LPA')
-    2. Roles They Can Aim For (list 2-3 most suitable job titles)
-    3. Skills They're Missing (list 3-5 key skills to acquire)
-    4. Suggested Learning Tracks (briefly suggest 2-3 learning paths or course types, but ALWAYS make the number 1 course one of the following, whichever is most relevant to the user's profile: NxtWave MERN Stack Developer Course, NxtWave Full-Stack Developer Course, NxtWave Data Analytics Course, NxtWave QA/Automation Testing Course. Clearly list it as the first item. The rest can be any other relevant courses or tracks.)
-    5. ROI of Upskilling (e.g., 'Increase salary by 80% in 6 months' or similar)
-    
-    Format your response as:
-    ---
-    Estimated Salary Range:
-    <salary range here>
-    
-    Roles They Can Aim For:
-    <roles here>
-    
-    Skills They're Missing:
-    <skills here>
-    
-    Suggested Learning Tracks:
-    1. <our course from the above list, most relevant to the user>
-    2. <other course>
-    3. <other course>
-    
-    ROI of Upskilling:
-    <roi here>
-    ---
-    
-    Do not skip any section. If you are unsure, make a reasonable guess. Do not add extra commentary or sections unless highly relevant.
-    
-    User Profile:
-    Education: {user_data['education']}
-    Experience: {user_data['experience']}
-    Technical Knowledge: {', '.join(user_data['tech_knowledge'])}
-    Interests: {user_data['interests']}
-    Career Goal: {user_data['goal']}
-    Dream Companies/Industries: {user_data['companies']}
-    Learning Style: {user_data['learning_style']}
-    Time Commitment: {user_data['time_commitment']} hours/week
-    Other Constraints: {user_data['other_constraints']}
+# --- LLM Recommendation Logic (shared with backend/llm_utils.py) ---
+@st.cache_resource
+def get_backend():
+    """Pooled client for BACKEND_URL, or None to generate reports in this process."""
+    if not os.getenv("BACKEND_URL"):
+        return None
+    # requests is only loaded by frontends that talk to a backend
+    from api_client import client_from_env
+    return client_from_env()
+
+@st.cache_resource
+def warm_up_llm_client() -> None:
+    """
+    Loads the Groq SDK and clients in the background once the first page is
+    on screen, so the user's first report does not wait for them.
+    """
+    if get_backend() is None:
+        threading.Thread(target=warm_up, name="groq-warm-up", daemon=True).start()
+
+# Every caller checks lookup_cached_report() first, which covers the cohort index
+def fetch_report(user_data: dict, priority: str = "interactive") -> dict:
+    backend = get_backend()
+    if backend is not None:
+        return backend.recommend(user_data)
+    return get_llm_recommendation(user_data, priority=priority, skip_cohort=True)
+
+def stream_report(user_data: dict):
+    backend = get_backend()
+    if backend is not None:
+        return backend.stream(user_data)
+    return stream_llm_recommendation(user_data, skip_cohort=True)
+
+@st.cache_resource
+def get_report_cache() -> ReportCache:
+    """Process-wide report cache shared by every Streamlit session."""
+    return ReportCache(
+        max_size=int(os.getenv("REPORT_CACHE_SIZE", "512")),
+        ttl=float(os.getenv("REPORT_CACHE_TTL", "3600")),
+    )
+
+def get_session_report_cache() -> ReportCache:
+    """This session's own reports, with the same TTL and LRU eviction as the shared cache."""
+    if "report_cache" not in st.session_state:
+        st.session_state.report_cache = ReportCache(max_size=SESSION_REPORT_CACHE_SIZE, ttl=get_report_cache().ttl)
+    return st.session_state.report_cache
+
+def lookup_cached_report(user_data: dict):
+    """
+    Returns the cached report for this profile, checking the session cache first,
+    the shared cache second and the cohort index last, or None if it has not
+    been generated yet.
+    """
+    key = report_cache_key(canonicalize_profile(user_data), MODEL, COMPLETION_PARAMS)
+    result = get_session_report_cache().get(key)
+    if result is None:
+        result = get_report_cache().get(key) or indexed_report(user_data)
+        if result is not None:
+            get_session_report_cache().set(key, result)
+    return result
+
+def is_complete_answer(result: dict) -> bool:
+    """False for errors and the backend's fallback estimate."""
+    return not (result.get("report", "").startswith("Error") or result.get("degraded"))
+
+def store_report(user_data: dict, result: dict):
+    # Never cache failures or the backend's fallback estimate, the next rerun should retry
+    if not is_complete_answer(result):
+        return
+    key = report_cache_key(canonicalize_profile(user_data), MODEL, COMPLETION_PARAMS)
+    # Incomplete reports stay in this session only, until the user retries
+    if not missing_sections(parse_sections(result["report"])):
+        get_report_cache().set(key, result)
+    get_session_report_cache().set(key, result)
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    """Process-wide pool for speculative report calls."""
+    # Speculative calls queue behind users who are already waiting on a report
+    return Prefetcher(
+        functools.partial(fetch_report, priority="batch"),
+        usable=is_complete_answer,
+        max_workers=int(os.getenv("PREFETCH_THREADS", "8")),
+    )
+
+def start_prefetch(user_data: dict):
+    """
+    Generate the report for this profile with empty constraints while the
+    user is on the optional step 9.
+    """
+    if not PREFETCH_REPORTS or lookup_cached_report({**user_data, "other_constraints": ""}) is not None:
+        return
+    get_prefetcher().discard(st.session_state.pop("prefetch", None))
+    st.session_state.prefetch = get_prefetcher().start({**user_data, "other_constraints": ""})
+
+def claim_prefetched_report(user_data: dict):
+    """
+    Waits for and returns the prefetched report if it was started for this
+    exact profile, or None (cancelling the prefetch) if constraints changed it.
+    A failed prefetch is not shown, the report is generated again in the foreground.
+    """
+    result = get_prefetcher().claim(st.session_state.pop("prefetch", None), user_data)
+    if result is None:
+        return None
+    store_report(user_data, result)
+    return result
+
+def section_box_html(key: str, body: str) -> str:
+    lines = [l.strip() for l in body.strip().split('\n') if l.strip()]
+    # Special handling for Suggested Learning Tracks: link our course to NxtWave
+    if key == "Suggested Learning Tracks" and lines and any(c.lower() in lines[0].lower() for c in NXTWAVE_COURSES):
+        # Extract course name (remove numbering if present)
+        course_name = lines[0]
+        if ". " in course_name:
+            course_name = course_name.split(". ", 1)[1]
+        # Make only the first course a link
+        lines[0] = f'<a href="https://www.ccbp.in/intensive" target="_blank" style="color:#a78bfa;text-decoration:underline;font-weight:600;">{course_name}</a>'
+    border = SECTION_BORDERS.get(key, "#23272f")
+    icon = SECTION_ICONS.get(key, "")
+    # One line per box: blank lines or indentation would end the HTML block in markdown
+    return (
+        f'<div class="ai-report-box" style="border-color:{border}">'
+        f'<div class="ai-report-title"><span class="ai-report-icon">{icon}</span>{key}</div>'
+        f'<div style="font-size:1.08em;">{"<br>".join(lines)}</div>'
+        '</div>'
+    )
+
+def report_grid_html(sections: dict) -> str:
+    boxes = "".join(
+        section_box_html(key, sections[key]) for key in REQUIRED_SECTIONS if sections.get(key, "").strip()
+    )
+    return f'<div class="ai-report-grid">{boxes}</div>'
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_report(report_hash: str, _report: str):
+    """
+    Parses a finished report and renders its grid once; reruns and other
+    sessions showing the same report reuse the HTML (keyed by report_hash).
+    Returns (html, missing section names).
+    """
+    sections = parse_sections(_report)
+    return report_grid_html(sections), missing_sections(sections)
+
+def report_hash(report: str) -> str:
+    return hashlib.sha256(report.encode("utf-8")).hexdigest()
+
+def generate_report(user_data: dict, report_area) -> dict:
     """
+    Returns the report for this profile from the caches or the prefetch, or
+    streams it into report_area section by section.
+    """
+    started = time.perf_counter()
+    result, served_from = lookup_cached_report(user_data), "cache"
+    if result is None and "prefetch" in st.session_state:
+        with st.spinner("Generating your report..."):
+            result, served_from = claim_prefetched_report(user_data), "prefetch"
+    if result is not None:
+        return capture_report(user_data, started, result, served_from)
+    streamed = {}
+    with st.spinner("Generating your report..."):
+        for event in stream_report(user_data):
+            if event["type"] == "section" and event["name"] in REQUIRED_SECTIONS:
+                streamed[event["name"]] = event["content"]
+                report_area.markdown(report_grid_html(streamed), unsafe_allow_html=True)
+            elif event["type"] in ("done", "error"):
+                result = {"report": event["report"]}
+    if result is None:
+        result = {"report": "No report received."}
+    store_report(user_data, result)
+    return capture_report(user_data, started, result, "llm")
+
+def capture_report(user_data: dict, started: float, result: dict, served_from: str) -> dict:
+    """Hands the request to the opt-in traffic capture and returns the result."""
+    capture = get_capture()
+    if capture is not None:
+        capture.record("app", user_data, time.perf_counter() - started, result, served_from)
+    return result
+
+@st.cache_data(ttl=300, max_entries=1024, show_spinner=False)
+def peer_comparison(user_data: dict, salary_range: str) -> Optional[dict]:
+    """
+    Where this salary range falls among earlier reports for the same goal
+    (see backend/salary_index.py), or None when there are too few of them.
+    """
+    backend = get_backend()
+    if backend is not None:
+        return backend.peers(user_data, salary_range)
+    # NumPy and the index are only loaded once a report is on screen
+    from salary_index import get_salary_index
+    index = get_salary_index()
+    return index.compare(user_data, salary_range) if index is not None else None
 
-def get_llm_recommendation(user_data: dict) -> dict:
-    api_key = os.getenv("GROQCLOUD_API_KEY")
-    if not api_key:
-        return {"report": "Error: GROQCLOUD_API_KEY not set in environment."}
-    client = Groq(api_key=api_key)
-    prompt = build_prompt(user_data)
+def peer_caption(comparison: dict) -> str:
+    cohort = " with ".join(comparison["cohort"].values())
+    low, high = comparison["peer_median_range"]
+    return (
+        f"Compared with {comparison['peers']:,} earlier reports for {cohort}: your estimate is above "
+        f"{comparison['percentile']:.0f}% of them. Their median range is ₹{low:g}–{high:g} LPA."
+    )
+
+@st.fragment
+def report_fragment(user_data: dict):
+    """
+    The AI report. Its widgets rerun only this fragment, and a finished
+    report is served from the render cache instead of being parsed again.
+    """
+    st.subheader(":sparkles: AI-Powered Career Report")
     try:
-        completion = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_completion_tokens=800,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
-        llm_reply = completion.choices[0].message.content
-        return {"report": llm_reply}
+        report_area = st.empty()
+        result = generate_report(user_data, report_area)
+        report = result.get("report", "No report received.")
+        fallback = report.startswith("Error") or result.get("degraded")
+        if report.startswith("Error"):
+            # Groq is unavailable: fall back to the instant offline estimate
+            st.info("Our AI advisor is unavailable right now, so this is a quick estimate based on your profile.")
+            with st.expander("Show raw AI response for debugging"):
+                st.code(report)
+            from estimator import estimate_result
+            report = estimate_result(user_data)["report"]
+        elif result.get("degraded"):
+            # The backend already fell back to the estimate
+            st.info("Our AI advisor is unavailable right now, so this is a quick estimate based on your profile.")
+        html, missing = render_report(report_hash(report), report)
+        report_area.markdown(html, unsafe_allow_html=True)
+        # Only an AI report is compared: the estimate's range says nothing about peers
+        salary_range = "" if fallback else parse_sections(report).get("Estimated Salary Range", "")
+        if salary_range and not missing:
+            try:
+                comparison = peer_comparison(user_data, salary_range)
+            except Exception:
+                comparison = None
+            if comparison is not None:
+                st.caption(peer_caption(comparison))
+        if missing:
+            st.warning(f"Some sections are missing from the AI report: {', '.join(missing)}. Please try again or contact support.")
+            if st.button("Try again"):
+                record_retry()
+                # Regenerate in structured mode, which validates all five sections
+                with st.spinner("Regenerating your report..."):
+                    store_report(user_data, fetch_report(user_data))
+                st.rerun(scope="fragment")
+            with st.expander("Show raw AI response for debugging"):
+                st.code(report)
     except Exception as e:
-        import traceback
-        error_msg = f"Error communicating with GroqCloud API: {str(e)}\n{traceback.format_exc()}"
-        return {"report": error_msg}
+        st.error(f"Failed to get recommendation: {e}")
 
 # --- Main Stepper Logic ---
 if st.session_state.step == 1:
@@ -336,117 +587,7 @@ elif st.session_state.step == 10:
     st.header("Your Career & Salary Estimation")
     user_data = st.session_state.user_data
     # --- AI-Powered Career Report Section ---
-    st.subheader(":sparkles: AI-Powered Career Report")
-    try:
-        result = get_llm_recommendation(user_data)
-        report = result.get("report", "No report received.")
-        required_keys = [
-            "Estimated Salary Range",
-            "Roles They Can Aim For",
-            "Skills They're Missing",
-            "Suggested Learning Tracks",
-            "ROI of Upskilling"
-        ]
-        sections = {}
-        current_section = None
-        for line in report.splitlines():
-            line = line.strip()
-            if not line or line == '---':
-                continue
-            if line.endswith(":") and len(line) < 40:
-                current_section = line[:-1]
-                sections[current_section] = ""
-            elif current_section:
-                sections[current_section] += line + "\n"
-        icon_map = {
-            "Estimated Salary Range": "💰",
-            "Roles They Can Aim For": "🎯",
-            "Skills They're Missing": "🛠️",
-            "Suggested Learning Tracks": "📚",
-            "ROI of Upskilling": "📈",
-        }
-        color_map = {
-            "Estimated Salary Range": "#181c20",
-            "Roles They Can Aim For": "#181c20",
-            "Skills They're Missing": "#181c20",
-            "Suggested Learning Tracks": "#181c20",
-            "ROI of Upskilling": "#181c20",
-        }
-        border_map = {
-            "Estimated Salary Range": "#6ee7b7",
-            "Roles They Can Aim For": "#7dd3fc",
-            "Skills They're Missing": "#fde68a",
-            "Suggested Learning Tracks": "#c4b5fd",
-            "ROI of Upskilling": "#fdba74",
-        }
-        # Responsive grid: 2 columns on desktop, 1 on mobile
-        st.markdown("""
-        <style>
-        .ai-report-grid { display: flex; flex-wrap: wrap; gap: 24px; margin-bottom: 32px; }
-        .ai-report-box {
-            background: #181c20;
-            border-radius: 14px;
-            box-shadow: 0 2px 12px #0004;
-            padding: 22px 20px 18px 20px;
-            min-width: 280px;
-            flex: 1 1 340px;
-            border: 2.5px solid #23272f;
-            margin-bottom: 0;
-            color: #f3f4f6;
-            font-family: 'IBM Plex Mono', monospace;
-        }
-        .ai-report-title { font-size: 1.13em; font-weight: 700; margin-bottom: 8px; display: flex; align-items: center; }
-        .ai-report-icon { font-size: 1.35em; margin-right: 10px; }
-        @media (max-width: 900px) {
-            .ai-report-grid { flex-direction: column; gap: 18px; }
-            .ai-report-box { min-width: 0; }
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        st.markdown('<div class="ai-report-grid">', unsafe_allow_html=True)
-        for key in required_keys:
-            if key in sections and sections[key].strip():
-                # Special handling for Suggested Learning Tracks: link our course to NxtWave
-                if key == "Suggested Learning Tracks":
-                    lines = [l.strip() for l in sections[key].strip().split('\n') if l.strip()]
-                    if lines and any(
-                        c.lower() in lines[0].lower() for c in [
-                            "NxtWave MERN Stack Developer Course",
-                            "NxtWave Full-Stack Developer Course",
-                            "NxtWave Data Analytics Course",
-                            "NxtWave QA/Automation Testing Course"
-                        ]
-                    ):
-                        # Extract course name (remove numbering if present)
-                        first_course = lines[0]
-                        course_name = first_course
-                        if ". " in first_course:
-                            course_name = first_course.split(". ", 1)[1]
-                        # Make only the first course a link
-                        lines[0] = f'<a href="https://www.ccbp.in/intensive" target="_blank" style="color:#a78bfa;text-decoration:underline;font-weight:600;">{course_name}</a>'
-                    html_lines = "<br>".join(lines)
-                    box_html = f'''
-                    <div class="ai-report-box" style="border-color:{border_map.get(key, '#23272f')}">
-                        <div class="ai-report-title"><span class="ai-report-icon">{icon_map.get(key, '')}</span>{key}</div>
-                        <div style="font-size:1.08em;white-space:pre-line;">{html_lines}</div>
-                    </div>
-                    '''
-                    st.markdown(box_html, unsafe_allow_html=True)
-                else:
-                    st.markdown(f'''
-                    <div class="ai-report-box" style="border-color:{border_map.get(key, '#23272f')}">
-                        <div class="ai-report-title"><span class="ai-report-icon">{icon_map.get(key, '')}</span>{key}</div>
-                        <div style="font-size:1.08em;white-space:pre-line;">{sections[key].strip()}</div>
-                    </div>
-                    ''', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-        missing_sections = [k for k in required_keys if k not in sections or not sections[k].strip()]
-        if missing_sections:
-            st.warning(f"Some sections are missing from the AI report: {', '.join(missing_sections)}. Please try again or contact support.")
-            with st.expander("Show raw AI response for debugging"):
-                st.code(report)
-    except Exception as e:
-        st.error(f"Failed to get recommendation: {e}")
+    report_fragment(user_data)
     # --- Profile Summary Section (below the report) ---
     st.subheader("Your Profile Summary")
     st.markdown(f"""
@@ -483,4 +624,7 @@ elif st.session_state.step == 10:
         "Made with ❤️ by Your Team | <a href='mailto:contact@yourdomain.com'>Contact Us</a>"
         "</div>",
         unsafe_allow_html=True
-    ) 
\ No newline at end of file
+    )
+
+# Once the page is drawn, so the import never delays it
+warm_up_llm_client()
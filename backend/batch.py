@@ -0,0 +1,66 @@
+"""
+Bounded parallel fan-out over a JSONL stream of UserData records.
+
+Input is consumed lazily and at most `concurrency` records are in flight,
+so memory stays constant regardless of batch size. Results are yielded in
+completion order, each tagged with the index of its input line.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Set
+
+Recommender = Callable[[dict], Awaitable[dict]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Re-chunk a byte stream into text lines.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+
+async def _run_one(index: int, line: str, recommend: Recommender) -> dict:
+    try:
+        record = json.loads(line)
+        result = await recommend(record)
+        return {"index": index, **result}
+    except Exception as e:
+        return {"index": index, "error": f"{type(e).__name__}: {e}"}
+
+
+async def run_batch(lines: AsyncIterator[str], recommend: Recommender, concurrency: int = 8) -> AsyncIterator[dict]:
+    """
+    Run `recommend` over every non-blank JSONL line with at most `concurrency`
+    records in flight, yielding results as they complete.
+    """
+    pending: Set[asyncio.Task] = set()
+    index = 0
+    try:
+        async for line in lines:
+            if not line.strip():
+                index += 1
+                continue
+            # Hand back anything already finished before blocking on a free slot
+            done = {task for task in pending if task.done()}
+            if len(pending) >= concurrency and not done:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                yield task.result()
+            pending.add(asyncio.create_task(_run_one(index, line, recommend)))
+            index += 1
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,82 @@
+"""
+Generate reports for a JSONL file of UserData records.
+
+Usage:
+    python batch_cli.py profiles.jsonl -o reports.ndjson --concurrency 16
+    python batch_cli.py profiles.jsonl --url http://localhost:8000
+
+Without --url the records are processed in this process against Groq;
+with --url they are streamed to the backend's /recommend/batch endpoint.
+Use '-' to read from stdin. Output is NDJSON in completion order.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+from typing import AsyncIterator, Iterator, TextIO
+
+from batch import run_batch
+from llm_utils import get_llm_recommendation_async
+
+
+async def _aiter(lines: Iterator[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line
+
+
+async def run_local(source: TextIO, out: TextIO, concurrency: int) -> None:
+    recommend = functools.partial(get_llm_recommendation_async, priority="batch")
+    async for result in run_batch(_aiter(source), recommend, concurrency):
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+async def run_remote(source: TextIO, out: TextIO, concurrency: int, url: str) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=None)) as client:
+        async with client.stream(
+            "POST",
+            url.rstrip("/") + "/recommend/batch",
+            params={"concurrency": concurrency},
+            content=_encode(source),
+            headers={"Content-Type": "application/x-ndjson"},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    out.write(line + "\n")
+                    out.flush()
+
+
+async def _encode(lines: Iterator[str]) -> AsyncIterator[bytes]:
+    for line in lines:
+        yield line.encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate career reports for a JSONL file of profiles.")
+    parser.add_argument("input", help="JSONL file of UserData records, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="max records in flight")
+    parser.add_argument("--url", help="backend base URL; process locally if omitted")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.url:
+            asyncio.run(run_remote(source, out, args.concurrency, args.url))
+        else:
+            asyncio.run(run_local(source, out, args.concurrency))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Build the cohort report index offline.
+
+Usage:
+    python build_cohort_index.py --top 2000 --concurrency 16
+    python build_cohort_index.py --profiles traffic.jsonl --top 500 -o cohorts.idx
+
+With --profiles (JSONL of UserData records, e.g. exported job payloads or
+batch inputs) cohorts are ranked by how often they occur there. Without it
+they are enumerated from the form options: every education, goal and
+learning style for each single popular language and each of --hours.
+
+The build is incremental: entries of the existing index whose key is still
+current are copied over, so after a prompt or model change only the
+cohorts whose key changed are sent to the LLM. Reports that failed or came
+back incomplete are left out and retried by the next build.
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import AsyncIterator, Dict, Iterator, List, Optional, TextIO
+
+from batch import run_batch
+from cohort_index import DEFAULT_PATH, CohortIndex, is_cohort, write_index
+from form_options import CAREER_GOALS, EDUCATION_LEVELS, LEARNING_STYLES, POPULAR_LANGUAGES
+from llm_utils import cohort_key, get_llm_recommendation_async
+from sections import missing_sections, parse_sections
+
+
+def _profile(education: str, goal: str, learning_style: str, hours: int, languages: List[str]) -> dict:
+    return {
+        "education": education,
+        "experience": "",
+        "tech_knowledge": languages,
+        "interests": "",
+        "goal": goal,
+        "companies": "",
+        "learning_style": learning_style,
+        "time_commitment": hours,
+        "other_constraints": "",
+    }
+
+
+def enumerate_cohorts(hours: List[int]) -> Iterator[dict]:
+    # Most popular languages first, so --top keeps the likeliest cohorts
+    for language, hour, education, goal, style in itertools.product(
+        POPULAR_LANGUAGES, hours, EDUCATION_LEVELS, CAREER_GOALS, LEARNING_STYLES
+    ):
+        yield _profile(education, goal, style, hour, [language])
+
+
+def ranked_cohorts(source: TextIO) -> Iterator[dict]:
+    """Cohort profiles from a JSONL file, most frequent first."""
+    counts: Counter = Counter()
+    profiles: Dict[str, dict] = {}
+    for line in source:
+        if not line.strip():
+            continue
+        profile = json.loads(line)
+        if not is_cohort(profile):
+            continue
+        key = cohort_key(profile)
+        counts[key] += 1
+        profiles.setdefault(key, profile)
+    for key, _ in counts.most_common():
+        yield profiles[key]
+
+
+def _complete(result: dict) -> bool:
+    report = result.get("report", "")
+    return not report.startswith("Error") and not result.get("degraded") and not missing_sections(parse_sections(report))
+
+
+async def _lines(profiles: List[dict]) -> AsyncIterator[str]:
+    for profile in profiles:
+        yield json.dumps(profile, ensure_ascii=False)
+
+
+async def build(path: str, cohorts: Iterator[dict], top: int, concurrency: int) -> Dict[str, int]:
+    wanted: Dict[str, dict] = {}
+    for profile in cohorts:
+        # Profiles that canonicalize to the same prompt share one entry
+        wanted.setdefault(cohort_key(profile), profile)
+        if len(wanted) >= top:
+            break
+    existing = dict(CohortIndex(path).items()) if os.path.exists(path) else {}
+    entries = {key: existing[key] for key in wanted if key in existing}
+    todo = [(key, profile) for key, profile in wanted.items() if key not in existing]
+    processed = failed = 0
+    recommend = functools.partial(get_llm_recommendation_async, priority="batch")
+    async for result in run_batch(_lines([profile for _, profile in todo]), recommend, concurrency):
+        key = todo[result.pop("index")][0]
+        if _complete(result):
+            entries[key] = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        else:
+            failed += 1
+        processed += 1
+        if processed % 100 == 0:
+            print(f"{processed}/{len(todo)} cohorts generated", file=sys.stderr)
+    write_index(path, entries.items())
+    return {
+        "cohorts": len(wanted),
+        "reused": len(wanted) - len(todo),
+        "generated": len(todo) - failed,
+        "failed": failed,
+        "dropped": len(set(existing) - set(wanted)),
+        "bytes": os.path.getsize(path),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute reports for the most frequent blank-free-text cohorts.")
+    parser.add_argument("-o", "--output", default=os.getenv("COHORT_INDEX_PATH", DEFAULT_PATH), help="index file to (re)build")
+    parser.add_argument("--profiles", help="JSONL of observed profiles to rank cohorts by frequency ('-' for stdin)")
+    parser.add_argument("--top", type=int, default=2000, help="number of cohorts to keep")
+    parser.add_argument("--hours", default="10", help="comma-separated time commitments to enumerate without --profiles")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="reports generated at once")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    if args.profiles:
+        with (sys.stdin if args.profiles == "-" else open(args.profiles, encoding="utf-8")) as source:
+            cohorts = list(ranked_cohorts(source))
+    else:
+        cohorts = enumerate_cohorts([int(h) for h in args.hours.split(",")])
+    stats = asyncio.run(build(args.output, iter(cohorts), args.top, args.concurrency))
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Profile canonicalization.
+
+Semantically identical profiles should produce the same prompt, and so the
+same cache key. tech_knowledge is sorted and de-duplicated; free-text fields
+are whitespace-collapsed and lower-cased; time_commitment can optionally be
+bucketed into coarse ranges.
+
+Run as a script to measure the effect on a JSONL file of profiles:
+    python canonical.py profiles.jsonl [--bucket-time]
+"""
+
+import argparse
+import json
+from typing import Iterable
+
+FREE_TEXT_FIELDS = ("experience", "interests", "companies", "other_constraints")
+
+# Upper bounds (hours/week) of the time_commitment buckets
+TIME_BUCKETS = (5, 10, 20, 40)
+
+
+def normalize_text(value) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+def bucket_time_commitment(hours: int) -> str:
+    lower = 1
+    for upper in TIME_BUCKETS:
+        if hours <= upper:
+            return f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{TIME_BUCKETS[-1] + 1}+"
+
+
+def canonicalize_profile(user_data: dict, bucket_time: bool = False) -> dict:
+    """
+    Returns a normalized copy of user_data; the input is not modified.
+    """
+    profile = dict(user_data)
+    seen = {}
+    for skill in user_data.get("tech_knowledge") or []:
+        skill = " ".join(str(skill).split())
+        if skill:
+            # Keep a deterministic spelling when duplicates differ only in case
+            seen[skill.lower()] = min(skill, seen.get(skill.lower(), skill))
+    profile["tech_knowledge"] = sorted(seen.values(), key=str.lower)
+    for field in FREE_TEXT_FIELDS:
+        if field in profile:
+            profile[field] = normalize_text(profile[field])
+    if bucket_time and profile.get("time_commitment") is not None:
+        profile["time_commitment"] = bucket_time_commitment(int(profile["time_commitment"]))
+    return profile
+
+
+def hit_rate_report(profiles: Iterable[dict], bucket_time: bool = False) -> dict:
+    """
+    Best-case cache hit rate (1 - unique/total) with raw vs canonical profiles.
+    """
+    total = 0
+    raw_keys, canonical_keys = set(), set()
+    for profile in profiles:
+        total += 1
+        raw_keys.add(json.dumps(profile, sort_keys=True))
+        canonical_keys.add(json.dumps(canonicalize_profile(profile, bucket_time), sort_keys=True))
+    if not total:
+        return {"profiles": 0}
+    raw_rate = 1 - len(raw_keys) / total
+    canonical_rate = 1 - len(canonical_keys) / total
+    return {
+        "profiles": total,
+        "unique_raw": len(raw_keys),
+        "unique_canonical": len(canonical_keys),
+        "hit_rate_raw": round(raw_rate, 4),
+        "hit_rate_canonical": round(canonical_rate, 4),
+        "hit_rate_gain": round(canonical_rate - raw_rate, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure how canonicalization raises the cache hit rate.")
+    parser.add_argument("input", help="JSONL file of UserData records")
+    parser.add_argument("--bucket-time", action="store_true", help="also bucket time_commitment")
+    args = parser.parse_args()
+    with open(args.input, encoding="utf-8") as f:
+        profiles = (json.loads(line) for line in f if line.strip())
+        print(json.dumps(hit_rate_report(profiles, args.bucket_time), indent=2))
+
+
+if __name__ == "__main__":
+    main()
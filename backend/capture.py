@@ -0,0 +1,217 @@
+"""
+Opt-in capture of real request shapes.
+
+With TRAFFIC_CAPTURE_DIR set, /recommend and the Streamlit results page log
+one JSON line per report request: the anonymized profile, the estimated
+prompt tokens, the latency, where the report came from and a hash of it.
+record() only puts the raw values on a bounded queue (dropping them when
+it is full), so the request path never waits on disk; a background thread
+anonymizes, encodes and appends them in batches to gzip-compressed JSONL
+files that rotate by size, keeping the newest TRAFFIC_CAPTURE_KEEP files.
+
+Anonymization keeps the option fields (education, goal, languages, ...)
+and replaces each free-text field with pseudo-words of the same length,
+derived from a salted hash (TRAFFIC_CAPTURE_SALT). Equal inputs stay equal,
+so replays keep realistic cache hit rates and prompt sizes without any
+user text leaving the process. Set TRAFFIC_CAPTURE_ANONYMIZE=0 to record
+the text verbatim, e.g. to pre-warm caches with replay.py --warm.
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from canonical import FREE_TEXT_FIELDS, canonicalize_profile
+from metrics import counter
+from prompt_engine import render_prompt
+
+logger = logging.getLogger(__name__)
+
+CAPTURED = counter("traffic_capture_events_total", "Traffic capture events by outcome (written, dropped).")
+
+_STOP = object()
+
+
+def pseudonymize(text: str, salt: str) -> str:
+    """Same-length stand-in for free text: hex pseudo-words from a salted hash."""
+    text = str(text or "")
+    if not text.strip():
+        return text
+    digest = hashlib.sha256((salt + text).encode("utf-8")).hexdigest()
+    words = " ".join(digest[i:i + 5] for i in range(0, len(digest), 5))
+    return (words * (len(text) // len(words) + 1))[:len(text)]
+
+
+def report_hash(report: str) -> str:
+    return hashlib.sha256(report.encode("utf-8")).hexdigest()[:16]
+
+
+class TrafficCapture:
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        keep: int = 20,
+        anonymize: bool = True,
+        salt: str = "",
+        queue_size: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.anonymize = anonymize
+        self.salt = salt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._raw = None
+        self._gzip = None
+        self._seq = 0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, source: str, user_data: dict, latency: float, result: Dict[str, Any], served_from: str = "llm") -> None:
+        """
+        Queue one request for the writer; never blocks. served_from says where
+        the report came from: llm (the LLM pipeline, including its response
+        cache), cohort, cache, prefetch or estimate.
+        """
+        try:
+            # Stamped with the arrival time, so replays keep the original request pattern
+            self._queue.put_nowait((time.time() - latency, source, dict(user_data), latency, result, served_from))
+        except queue.Full:
+            self.dropped += 1
+            CAPTURED.inc(outcome="dropped")
+
+    # --- writer thread ---
+
+    def _encode(self, item) -> str:
+        ts, source, user_data, latency, result, served_from = item
+        profile = canonicalize_profile(user_data)
+        prompt_tokens = render_prompt(profile).tokens
+        if self.anonymize:
+            for field in FREE_TEXT_FIELDS:
+                if field in user_data:
+                    user_data[field] = pseudonymize(user_data[field], self.salt)
+        report = result.get("report", "")
+        return json.dumps({
+            "ts": round(ts, 3),
+            "source": source,
+            "user_data": user_data,
+            "prompt_tokens": prompt_tokens,
+            "latency_ms": round(latency * 1000, 1),
+            "served_from": served_from,
+            "outcome": "error" if report.startswith("Error") else "degraded" if result.get("degraded") else "ok",
+            "model": result.get("model"),
+            "report_hash": report_hash(report),
+        }, ensure_ascii=False)
+
+    def _open(self) -> None:
+        self._seq += 1
+        name = f"capture-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._seq}.jsonl.gz"
+        self._raw = open(os.path.join(self.directory, name), "ab")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        files = sorted(
+            (os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.startswith("capture-") and f.endswith(".jsonl.gz")),
+            key=os.path.getmtime,
+        )
+        for old in files[:-self.keep] if self.keep > 0 else []:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def _close_file(self) -> None:
+        if self._gzip is not None:
+            self._gzip.close()
+            self._raw.close()
+            self._gzip = self._raw = None
+
+    def _write(self, batch: List) -> None:
+        lines = []
+        for item in batch:
+            try:
+                lines.append(self._encode(item) + "\n")
+            except Exception:
+                logger.exception("could not encode a capture event")
+        if self._gzip is None:
+            self._open()
+        self._gzip.write("".join(lines).encode("utf-8"))
+        # A sync flush keeps the file readable up to here, even if the process dies
+        self._gzip.flush()
+        self.written += len(lines)
+        CAPTURED.inc(len(lines), outcome="written")
+        if self._raw.tell() >= self.max_bytes:
+            self._close_file()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            stop = item is _STOP
+            batch = [] if stop else [item]
+            deadline = time.monotonic() + self.flush_interval
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception:
+                logger.exception("writing traffic capture failed")
+                self._close_file()
+            if stop:
+                self._close_file()
+                return
+
+    def close(self) -> None:
+        """Flush what is queued and close the current file."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=1)
+            except queue.Full:
+                return
+            self._thread.join(timeout=5)
+
+
+_capture: Optional[TrafficCapture] = None
+_capture_lock = threading.Lock()
+
+
+def get_capture() -> Optional[TrafficCapture]:
+    """
+    Returns the process-wide capture, or None unless TRAFFIC_CAPTURE_DIR is set.
+    """
+    global _capture
+    directory = os.getenv("TRAFFIC_CAPTURE_DIR")
+    if not directory:
+        return None
+    if _capture is None:
+        with _capture_lock:
+            if _capture is None:
+                _capture = TrafficCapture(
+                    directory,
+                    max_bytes=int(float(os.getenv("TRAFFIC_CAPTURE_MAX_MB", "64")) * 1024 * 1024),
+                    keep=int(os.getenv("TRAFFIC_CAPTURE_KEEP", "20")),
+                    anonymize=os.getenv("TRAFFIC_CAPTURE_ANONYMIZE", "1").lower() in ("1", "true", "yes"),
+                    salt=os.getenv("TRAFFIC_CAPTURE_SALT", ""),
+                )
+    return _capture
@@ -0,0 +1,152 @@
+"""
+Per-model circuit breaker for Groq calls.
+
+Each model keeps the outcomes of its last calls. Once enough of them failed
+(5xx, timeouts, connection errors; 429s are the rate scheduler's business)
+the breaker opens and calls fail fast with CircuitOpen instead of waiting
+out timeouts, so the router falls through to the hedge model or the API to
+its offline estimate. After a cooldown one probe call is let through: if it
+succeeds the breaker closes, otherwise it stays open for another cooldown.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from metrics import counter
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+TRANSITIONS = counter("llm_circuit_transitions_total", "Circuit breaker state changes by model and new state.")
+REJECTED = counter("llm_circuit_rejected_total", "Calls failed fast by an open circuit, by model.")
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a model whose circuit is open."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Circuit open for {model}, retry in {retry_after:.1f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Failure-rate breaker over a window of the most recent calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 30.0,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str, now: float) -> None:
+        # Caller holds the lock
+        self.state = state
+        if state == OPEN:
+            self.opened_at = now
+        self.probe_started = None
+        self._outcomes.clear()
+        TRANSITIONS.inc(model=self.name, state=state)
+
+    def allow(self) -> None:
+        """
+        Raises CircuitOpen unless a call may go through now. While half-open
+        only one probe runs at a time; a probe that never reports back (e.g. a
+        cancelled hedge) is replaced after a cooldown.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self._transition(HALF_OPEN, now)
+            if self.state == HALF_OPEN and (self.probe_started is None or now - self.probe_started >= self.cooldown):
+                self.probe_started = now
+                return
+            if self.state == CLOSED:
+                return
+            retry_after = max(0.0, self.opened_at + self.cooldown - now) if self.state == OPEN else self.cooldown
+        REJECTED.inc(model=self.name)
+        raise CircuitOpen(self.name, retry_after)
+
+    def available(self) -> bool:
+        """True if allow() would currently let a call through; does not take the probe."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return self.state == CLOSED or self.probe_started is None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED, time.monotonic())
+            else:
+                self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN, now)
+                return
+            if self.state == OPEN:
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN, now)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": len(self._outcomes),
+                "failures": self._outcomes.count(False),
+                "open_for": round(max(0.0, self.opened_at + self.cooldown - time.monotonic()), 2)
+                if self.state == OPEN else 0.0,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    """
+    Returns the breaker for a model, configured from CIRCUIT_FAILURE_RATE,
+    CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS and CIRCUIT_COOLDOWN.
+    """
+    breaker = _breakers.get(model)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(model)
+            if breaker is None:
+                breaker = _breakers[model] = CircuitBreaker(
+                    model,
+                    failure_rate=float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+                    window=int(os.getenv("CIRCUIT_WINDOW", "20")),
+                    min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+                    cooldown=float(os.getenv("CIRCUIT_COOLDOWN", "30")),
+                )
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -0,0 +1,151 @@
+"""
+Read-only index of precomputed cohort reports.
+
+A cohort is a profile whose free-text fields are all blank, so it is made
+only of form options (education, goal, learning style, hours, languages).
+build_cohort_index.py generates reports for the most frequent cohorts
+offline and writes them here; lookups need no LLM call and no database.
+
+File layout (little-endian):
+    header   8s magic, I entry count
+    entries  count x (32s key, Q offset, I length), sorted by key
+    data     UTF-8 JSON results, addressed by offset/length from file start
+
+Keys are the raw bytes of the request hash from llm_utils.canonical_request,
+which covers the prompt text, model and sampling params; after a prompt or
+model change old entries simply stop matching, and the builder regenerates
+only those. The file is memory-mapped and binary-searched, so every worker
+process shares the same page cache, and a rebuilt file (written elsewhere
+and renamed into place) is picked up on the next reload check.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from canonical import FREE_TEXT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "cohorts.idx")
+
+MAGIC = b"NXCOHRT1"
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<32sQI")
+
+# Re-stat the file at most this often to pick up a rebuilt index
+_RELOAD_INTERVAL = 30.0
+
+
+def is_cohort(user_data: dict) -> bool:
+    return not any(str(user_data.get(field) or "").strip() for field in FREE_TEXT_FIELDS)
+
+
+def write_index(path: str, entries: Iterable[Tuple[str, bytes]]) -> int:
+    """
+    Writes (hex key, JSON bytes) pairs as a new index, atomically replacing
+    any index at `path`. Returns the number of entries written.
+    """
+    items = sorted((bytes.fromhex(key), value) for key, value in dict(entries).items())
+    offset = _HEADER.size + _ENTRY.size * len(items)
+    table, data = [], []
+    for key, value in items:
+        table.append(_ENTRY.pack(key, offset, len(value)))
+        data.append(value)
+        offset += len(value)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(items)))
+        f.writelines(table)
+        f.writelines(data)
+    os.replace(tmp, path)
+    return len(items)
+
+
+class CohortIndex:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._identity = None
+        self._checked = 0.0
+        self._reload()
+
+    def _reload(self) -> None:
+        self._checked = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._mm, self._count, self._identity = None, 0, None
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity == self._identity:
+            return
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+        if mm is None or mm[:len(MAGIC)] != MAGIC:
+            logger.warning("%s is not a cohort index, ignoring it", self.path)
+            self._mm, self._count, self._identity = None, 0, identity
+            return
+        # The previous map stays valid for lookups already holding it
+        self._mm, self._count, self._identity = mm, _HEADER.unpack_from(mm)[1], identity
+
+    def _raw(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            if time.monotonic() - self._checked >= _RELOAD_INTERVAL:
+                self._reload()
+            mm, count = self._mm, self._count
+        if mm is None:
+            return None
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_key, offset, length = _ENTRY.unpack_from(mm, _HEADER.size + mid * _ENTRY.size)
+            if entry_key == key:
+                return mm[offset:offset + length]
+            if entry_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._raw(bytes.fromhex(key))
+        return json.loads(raw) if raw is not None else None
+
+    def items(self) -> Iterator[Tuple[str, bytes]]:
+        """(hex key, raw JSON) for every entry; used for incremental rebuilds."""
+        mm, count = self._mm, self._count
+        for i in range(count if mm is not None else 0):
+            key, offset, length = _ENTRY.unpack_from(mm, _HEADER.size + i * _ENTRY.size)
+            yield key.hex(), mm[offset:offset + length]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+_index: Optional[CohortIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_cohort_index() -> Optional[CohortIndex]:
+    """
+    Returns the process-wide index at COHORT_INDEX_PATH, or None when
+    COHORT_INDEX_PATH is 'off'. A missing file is an empty index until built.
+    """
+    global _index
+    path = os.getenv("COHORT_INDEX_PATH", DEFAULT_PATH)
+    if path.lower() in ("", "0", "off", "none"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CohortIndex(path)
+    return _index
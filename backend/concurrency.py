@@ -0,0 +1,93 @@
+"""
+Admission control for the async LLM endpoints.
+
+At most `max_in_flight` upstream calls run at once and at most `max_queue`
+requests wait for a slot. Anything beyond that is rejected straight away
+with `Overloaded`, which the API turns into a 503 with a Retry-After header.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from metrics import STAGE_SECONDS
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is busy, please retry later.")
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Bounds in-flight work and the wait queue in front of it.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 256,
+        max_wait: Optional[float] = 30.0,
+        retry_after: int = 5,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """Waits for an in-flight slot, or raises Overloaded if the queue is full."""
+        # Counters are updated before the first await, so the check is race-free
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+        finally:
+            self.waiting -= 1
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="queue")
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+def limiter_from_env() -> AdmissionLimiter:
+    """Builds the limiter from LLM_MAX_IN_FLIGHT / LLM_MAX_QUEUE / LLM_MAX_WAIT / LLM_RETRY_AFTER."""
+    max_wait = float(os.getenv("LLM_MAX_WAIT", "30"))
+    return AdmissionLimiter(
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "64")),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "256")),
+        max_wait=max_wait if max_wait > 0 else None,
+        retry_after=int(os.getenv("LLM_RETRY_AFTER", "5")),
+    )
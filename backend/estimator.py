@@ -0,0 +1,156 @@
+"""
+Offline, deterministic salary/role estimator.
+
+Built only from the enumerated form inputs (education, goal, learning style,
+time commitment, tech knowledge) and precomputed lookup tables, so it runs
+in microseconds with no network. Whole batches are scored at once with
+NumPy. Used as an instant preview while the LLM runs and as a degraded
+answer when Groq is unavailable.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from form_options import CAREER_GOALS, EDUCATION_LEVELS, LEARNING_STYLES, OTHER_LANGUAGES, POPULAR_LANGUAGES
+from report_schema import CareerReport
+
+# One-hot features follow the form's own option lists and order
+EDUCATION = EDUCATION_LEVELS
+GOALS = CAREER_GOALS
+
+SKILLS = POPULAR_LANGUAGES + [s for s in OTHER_LANGUAGES if s != "Other"] + [
+    # Non-language skills that only ever show up as "missing"
+    "React", "Node.js", "Data Structures & Algorithms", "Git", "Excel", "Power BI", "Statistics",
+    "Selenium", "API Testing", "Test Case Design", "MongoDB", "Express.js",
+]
+_SKILL_INDEX = {s.lower(): i for i, s in enumerate(SKILLS)}
+
+# Per goal: base salary range (LPA) for a Bachelor's degree, roles, required skills, NxtWave track
+_GOAL_TABLE = {
+    "Software Developer": (
+        (4.5, 9.0),
+        ["Software Developer", "Backend Developer", "Associate Software Engineer"],
+        ["Data Structures & Algorithms", "Java", "Python", "SQL", "Git"],
+        "NxtWave Full-Stack Developer Course",
+    ),
+    "Data Analyst": (
+        (4.0, 8.0),
+        ["Data Analyst", "Business Analyst", "MIS Analyst"],
+        ["SQL", "Python", "Excel", "Power BI", "Statistics"],
+        "NxtWave Data Analytics Course",
+    ),
+    "QA/Automation Tester": (
+        (3.5, 7.0),
+        ["QA Engineer", "Automation Test Engineer", "SDET"],
+        ["Selenium", "Java", "API Testing", "Test Case Design", "SQL"],
+        "NxtWave QA/Automation Testing Course",
+    ),
+    "Full Stack Developer": (
+        (5.0, 10.0),
+        ["Full Stack Developer", "MERN Stack Developer", "Frontend Developer"],
+        ["JavaScript", "React", "Node.js", "MongoDB", "HTML/CSS"],
+        "NxtWave MERN Stack Developer Course",
+    ),
+    "Other": (
+        (4.0, 8.0),
+        ["Software Developer", "Technical Support Engineer"],
+        ["Python", "SQL", "Git", "JavaScript", "Data Structures & Algorithms"],
+        "NxtWave Full-Stack Developer Course",
+    ),
+}
+
+_SECONDARY_TRACKS = {
+    "Software Developer": ["DSA problem-solving track", "System design fundamentals"],
+    "Data Analyst": ["Statistics for data analysis", "Power BI / Tableau dashboards"],
+    "QA/Automation Tester": ["Selenium WebDriver with Java", "API testing with Postman"],
+    "Full Stack Developer": ["Advanced React", "Node.js REST APIs"],
+    "Other": ["Programming fundamentals", "Git and version control"],
+}
+
+# Indexed like EDUCATION and LEARNING_STYLES
+_EDUCATION_MULTIPLIER = np.array([0.7, 0.8, 1.0, 1.15, 1.3, 0.9])
+# Structured learning completes a little faster than purely self-paced
+_STYLE_SPEED = np.array([0.9, 1.1, 1.05, 1.0])
+
+_BASE_RANGE = np.array([_GOAL_TABLE[g][0] for g in GOALS])  # (goals, 2)
+_REQUIRED = np.zeros((len(GOALS), len(SKILLS)), dtype=bool)
+for _g, _goal in enumerate(GOALS):
+    for _skill in _GOAL_TABLE[_goal][2]:
+        _REQUIRED[_g, _SKILL_INDEX[_skill.lower()]] = True
+_REQUIRED_COUNT = _REQUIRED.sum(axis=1)
+
+
+def _index(options: List[str], value, default: int) -> int:
+    try:
+        return options.index(value)
+    except ValueError:
+        return default
+
+
+def _encode(profiles: List[dict]) -> tuple:
+    n = len(profiles)
+    education = np.empty(n, dtype=np.intp)
+    goal = np.empty(n, dtype=np.intp)
+    style = np.empty(n, dtype=np.intp)
+    hours = np.empty(n, dtype=np.float64)
+    known = np.zeros((n, len(SKILLS)), dtype=bool)
+    for i, p in enumerate(profiles):
+        education[i] = _index(EDUCATION, p.get("education"), EDUCATION.index("Other"))
+        goal[i] = _index(GOALS, p.get("goal"), GOALS.index("Other"))
+        style[i] = _index(LEARNING_STYLES, p.get("learning_style"), LEARNING_STYLES.index("No preference"))
+        hours[i] = p.get("time_commitment") or 10
+        for skill in p.get("tech_knowledge") or []:
+            j = _SKILL_INDEX.get(str(skill).strip().lower())
+            if j is not None:
+                known[i, j] = True
+    return education, goal, style, hours, known
+
+
+def estimate_batch(profiles: List[dict]) -> List[CareerReport]:
+    """
+    Score a batch of profiles at once.
+    """
+    if not profiles:
+        return []
+    education, goal, style, hours, known = _encode(profiles)
+    required = _REQUIRED[goal]                      # (n, skills)
+    missing = required & ~known
+    coverage = (required & known).sum(axis=1) / _REQUIRED_COUNT[goal]
+
+    # Current-skill salary range, nudged up by how much of the role's stack is covered
+    salary = _BASE_RANGE[goal] * _EDUCATION_MULTIPLIER[education, None] * (1 + 0.3 * coverage)[:, None]
+    low = np.round(salary[:, 0]).astype(int).clip(2, None)
+    high = np.maximum(np.round(salary[:, 1]).astype(int), low + 2)
+
+    # Months to job-ready: fewer with more hours/week and more existing coverage
+    months = np.ceil(6 * (10 / np.clip(hours, 1, 40)) ** 0.5 * (1 - 0.5 * coverage) / _STYLE_SPEED[style])
+    months = months.clip(3, 18).astype(int)
+    uplift = np.round((1 - coverage) * 60 + 20, -1).astype(int)
+
+    reports = []
+    for i in range(len(profiles)):
+        goal_name = GOALS[goal[i]]
+        _, roles, _, track = _GOAL_TABLE[goal_name]
+        gaps = [SKILLS[j] for j in np.flatnonzero(missing[i])]
+        # Values come from our own tables, so skip validation
+        reports.append(CareerReport.model_construct(
+            salary_range=f"₹{low[i]}–{high[i]} LPA",
+            roles=roles,
+            missing_skills=gaps or ["Interview preparation", "Portfolio projects"],
+            learning_tracks=[track] + _SECONDARY_TRACKS[goal_name],
+            roi=f"Increase salary by {uplift[i]}% in {months[i]} months",
+        ))
+    return reports
+
+
+def estimate(profile: dict) -> CareerReport:
+    return estimate_batch([profile])[0]
+
+
+def estimate_result(profile: dict) -> Dict[str, object]:
+    """
+    The estimate in the same shape as an LLM result, tagged with tier='estimate'.
+    """
+    report = estimate(profile)
+    return {"report": report.to_text(), "structured": report.model_dump(), "tier": "estimate"}
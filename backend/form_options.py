@@ -0,0 +1,23 @@
+"""
+Option lists of the Streamlit form.
+
+Shared by app.py, which renders them, build_cohort_index.py, which
+enumerates the profiles they can produce, and estimator.py, whose one-hot
+features follow them.
+"""
+
+EDUCATION_LEVELS = ["High School", "Diploma", "Bachelor's Degree", "Master's Degree", "PhD", "Other"]
+
+CAREER_GOALS = ["Software Developer", "Data Analyst", "QA/Automation Tester", "Full Stack Developer", "Other"]
+
+LEARNING_STYLES = ["Self-paced", "Instructor-led", "Hybrid", "No preference"]
+
+# Offered as one-click buttons, most in-demand first
+POPULAR_LANGUAGES = [
+    "Python", "JavaScript", "Java", "C#", "C++", "TypeScript", "Go", "Ruby", "PHP", "SQL", "HTML/CSS"
+]
+OTHER_LANGUAGES = [
+    "Kotlin", "Swift", "Scala", "Rust", "Dart", "Perl", "MATLAB", "R", "Objective-C", "Shell", "Assembly", "Other"
+]
+
+TIME_COMMITMENT_MIN, TIME_COMMITMENT_MAX, TIME_COMMITMENT_DEFAULT = 1, 40, 10
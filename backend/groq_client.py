@@ -0,0 +1,174 @@
+"""
+Process-wide pooled Groq client.
+
+The client is created lazily on first use and reused by every request, so
+connections (and their TLS sessions) are kept alive between calls.
+Pool sizing and connect/read/write/pool timeouts are configured through
+environment variables; llm_utils caps them per attempt at the call's total
+deadline (LLM_TOTAL_TIMEOUT).
+The SDK's own retries are off: llm_utils retries through the rate
+scheduler, so a retried call still waits its turn.
+
+groq and httpx are imported on first use rather than at module import:
+together they are most of a cold start, and processes that never call
+Groq (a Streamlit frontend with BACKEND_URL, a replica serving cached or
+indexed reports) never pay for them.
+"""
+
+import functools
+import os
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+    from groq import AsyncGroq, Groq
+
+_client: Optional["Groq"] = None
+_async_client: Optional["AsyncGroq"] = None
+_client_lock = threading.Lock()
+
+
+def _http2_enabled() -> bool:
+    setting = os.getenv("GROQ_HTTP2", "auto").lower()
+    if setting in ("0", "false", "no", "off"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        # httpx needs the optional h2 package for HTTP/2
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """
+    (RateLimitError, InternalServerError, APIConnectionError). Usable in an
+    except clause: it is only evaluated once an exception is raised.
+    """
+    from groq import APIConnectionError, InternalServerError, RateLimitError
+
+    return RateLimitError, InternalServerError, APIConnectionError
+
+
+def is_rate_limit(e: BaseException) -> bool:
+    """True for a Groq 429."""
+    return isinstance(e, retryable_errors()[0])
+
+
+def client_timeout() -> "httpx.Timeout":
+    """Explicit connect/read timeouts for Groq calls."""
+    import httpx
+
+    return httpx.Timeout(
+        connect=float(os.getenv("GROQ_CONNECT_TIMEOUT", "5")),
+        read=float(os.getenv("GROQ_READ_TIMEOUT", "60")),
+        write=float(os.getenv("GROQ_WRITE_TIMEOUT", "10")),
+        pool=float(os.getenv("GROQ_POOL_TIMEOUT", "10")),
+    )
+
+
+def attempt_timeout(remaining: float) -> "httpx.Timeout":
+    """The client timeouts, each capped at what is left of a call's total deadline."""
+    import httpx
+
+    timeout = client_timeout()
+    return httpx.Timeout(
+        connect=min(timeout.connect, remaining),
+        read=min(timeout.read, remaining),
+        write=min(timeout.write, remaining),
+        pool=min(timeout.pool, remaining),
+    )
+
+
+def client_limits() -> "httpx.Limits":
+    """Connection pool size and keep-alive settings for Groq calls."""
+    import httpx
+
+    return httpx.Limits(
+        max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("GROQ_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def get_client() -> "Groq":
+    """
+    Returns the shared Groq client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from groq import Groq
+
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    limits=client_limits(),
+                    timeout=client_timeout(),
+                    http2=_http2_enabled(),
+                )
+                _client = Groq(
+                    api_key=os.getenv("GROQCLOUD_API_KEY"),
+                    base_url=os.getenv("GROQ_BASE_URL") or None,
+                    timeout=client_timeout(),
+                    max_retries=0,
+                    http_client=http_client,
+                )
+    return _client
+
+
+def get_async_client() -> "AsyncGroq":
+    """
+    Returns the shared async Groq client, creating it on first use.
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from groq import AsyncGroq
+
+        with _client_lock:
+            if _async_client is None:
+                http_client = httpx.AsyncClient(
+                    limits=client_limits(),
+                    timeout=client_timeout(),
+                    http2=_http2_enabled(),
+                )
+                _async_client = AsyncGroq(
+                    api_key=os.getenv("GROQCLOUD_API_KEY"),
+                    base_url=os.getenv("GROQ_BASE_URL") or None,
+                    timeout=client_timeout(),
+                    max_retries=0,
+                    http_client=http_client,
+                )
+    return _async_client
+
+
+def warm_up() -> None:
+    """
+    Imports the SDK and builds both clients ahead of the first call. Run it
+    off the request path (a thread) once the process is already serving.
+    """
+    retryable_errors()
+    # Without a key there is nothing to build; callers report the missing key
+    if os.getenv("GROQCLOUD_API_KEY"):
+        get_client()
+        get_async_client()
+
+
+def close_client() -> None:
+    """Closes the shared sync client and its connection pool."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def close_async_client() -> None:
+    """Closes the shared async client and its connection pool."""
+    global _async_client
+    client, _async_client = _async_client, None
+    if client is not None:
+        await client.close()
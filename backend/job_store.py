@@ -0,0 +1,191 @@
+"""
+Durable report job queue backed by SQLite in WAL mode.
+
+POST /recommend/jobs only inserts a row; workers (in the API process or
+started separately with job_worker.py) claim rows, run the report and write
+the result back. Claims are leases: a job whose worker died is picked up
+again once its lease expires, so jobs survive restarts of either side.
+Each claim gets a new lease token, and only its holder can finish or
+requeue the job, so a worker that outlived its lease cannot overwrite the
+attempt that replaced it. Finished jobs are purged after a TTL.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from rate_scheduler import PRIORITIES
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs.sqlite3")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# Run the purge once every this many submits
+_PURGE_EVERY = 256
+
+
+class JobStore:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = 24 * 3600, lease: float = 180.0):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self._local = threading.local()
+        self._submits = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " available_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " lease_until REAL,"
+            " lease_owner TEXT)"
+        )
+        # Stores created before lease tokens
+        if "lease_owner" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, available_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, payload: Dict[str, Any], priority: str = "interactive") -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, priority, payload, created_at, available_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, PRIORITIES[priority], json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        self._submits += 1
+        if self._submits % _PURGE_EVERY == 0:
+            self.purge()
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, Dict[str, Any], str, int, str]]:
+        """
+        Leases the next runnable job: queued ones by priority then age, or a
+        running one whose lease expired. Returns (id, payload, priority,
+        attempt, lease token) or None.
+        """
+        now = time.time()
+        lease = uuid.uuid4().hex
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload, priority, attempts FROM jobs"
+                " WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?)"
+                " ORDER BY priority, available_at LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ?, lease_owner = ?"
+                    " WHERE id = ?",
+                    (RUNNING, now, now + self.lease, lease, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        names = {rank: name for name, rank in PRIORITIES.items()}
+        return row[0], json.loads(row[1]), names.get(row[2], "batch"), row[3] + 1, lease
+
+    def _finish(self, job_id: str, lease: str, assignments: str, values: tuple) -> bool:
+        # False when the lease expired and the job was claimed again (or already finished)
+        return self._conn().execute(
+            f"UPDATE jobs SET {assignments}, lease_until = NULL, lease_owner = NULL WHERE id = ? AND lease_owner = ?",
+            (*values, job_id, lease),
+        ).rowcount == 1
+
+    def complete(self, job_id: str, lease: str, result: Dict[str, Any]) -> bool:
+        return self._finish(
+            job_id, lease, "status = ?, result = ?, finished_at = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), time.time()),
+        )
+
+    def retry(self, job_id: str, lease: str, error: str, delay: float) -> bool:
+        """Puts a failed attempt back in the queue after `delay` seconds."""
+        return self._finish(job_id, lease, "status = ?, error = ?, available_at = ?", (QUEUED, error, time.time() + delay))
+
+    def fail(self, job_id: str, lease: str, error: str) -> bool:
+        return self._finish(job_id, lease, "status = ?, error = ?, finished_at = ?", (FAILED, error, time.time()))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT id, status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "id": row[0],
+            "status": row[1],
+            "attempts": row[4],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7],
+        }
+        if row[2] is not None:
+            job["result"] = json.loads(row[2])
+        if row[3] is not None and row[1] != DONE:
+            job["error"] = row[3]
+        return job
+
+    def purge(self) -> int:
+        """Drops finished jobs older than the TTL."""
+        try:
+            return self._conn().execute(
+                "DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for status, count in self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """
+    Returns the process-wide job store at JOB_STORE_PATH.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(
+                    os.getenv("JOB_STORE_PATH", DEFAULT_PATH),
+                    ttl=float(os.getenv("JOB_TTL", str(24 * 3600))),
+                    lease=float(os.getenv("JOB_LEASE", "180")),
+                )
+    return _store
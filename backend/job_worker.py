@@ -0,0 +1,120 @@
+"""
+Workers that drain the report job queue.
+
+They run inside the API process (JOB_WORKERS, started from main's lifespan)
+or as separate processes pointed at the same JOB_STORE_PATH:
+    python job_worker.py --concurrency 8
+
+A failed attempt is retried with backoff up to JOB_MAX_ATTEMPTS; after that
+the job finishes with the offline estimate (degraded) or, with
+ESTIMATE_FALLBACK=0, as failed.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+from job_store import JobStore, get_job_store
+from llm_utils import get_llm_recommendation_async
+
+logger = logging.getLogger(__name__)
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+# Idle workers re-check the store this often; in-process submits wake them at once
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+ESTIMATE_FALLBACK = os.getenv("ESTIMATE_FALLBACK", "1").lower() in ("1", "true", "yes")
+
+
+async def run_job(store: JobStore, job_id: str, payload: Dict, priority: str, attempt: int, lease: str) -> None:
+    try:
+        result = await get_llm_recommendation_async(payload, priority=priority)
+        error = result["report"] if result["report"].startswith("Error") else None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    if error is None:
+        finished = await asyncio.to_thread(store.complete, job_id, lease, result)
+    else:
+        error = error.splitlines()[0]
+        if attempt < JOB_MAX_ATTEMPTS:
+            logger.warning("job %s attempt %d failed, retrying: %s", job_id, attempt, error)
+            finished = await asyncio.to_thread(store.retry, job_id, lease, error, JOB_RETRY_DELAY * 2 ** (attempt - 1))
+        elif ESTIMATE_FALLBACK:
+            from estimator import estimate_result
+
+            finished = await asyncio.to_thread(store.complete, job_id, lease, {**estimate_result(payload), "degraded": True})
+        else:
+            finished = await asyncio.to_thread(store.fail, job_id, lease, error)
+    if not finished:
+        logger.warning("job %s attempt %d outlived its lease; its outcome was dropped", job_id, attempt)
+
+
+class JobWorkers:
+    """
+    A fixed number of asyncio workers claiming jobs from the store.
+    """
+
+    def __init__(self, store: JobStore, concurrency: int):
+        self.store = store
+        self.concurrency = concurrency
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake an idle worker; called after a submit in this process."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # claim() can wait on another process's write lock; keep that off the event loop
+                job = await asyncio.to_thread(self.store.claim)
+            except Exception:
+                logger.exception("claiming a job failed")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await run_job(self.store, *job)
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        # Jobs cut off here keep their lease and are picked up again once it expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def serve(concurrency: int) -> None:
+    workers = JobWorkers(get_job_store(), concurrency)
+    workers.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await workers.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run report job workers against the shared job store.")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="jobs processed at once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
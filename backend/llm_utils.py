@@ -4,73 +4,677 @@
 # INSTRUCTION: The GroqCloud chat completions endpoint is now https://api.groq.com/openai/v1/chat/completions
 
 from dotenv import load_dotenv
+import asyncio
+import itertools
+import logging
 import os
-from groq import Groq
-from typing import Dict
+import random
+import time
+from groq_client import attempt_timeout, get_async_client, get_client, is_rate_limit, retryable_errors
+from circuit_breaker import CircuitOpen, breaker_stats, get_breaker
+from rate_scheduler import get_scheduler
+from router import HEDGE, PRIMARY, Route, hedged, hedged_sync, latency_stats, routing_stats
+from sections import SectionStream, missing_sections, parse_sections
+from singleflight import AsyncSingleFlight, SingleFlight, prompt_key
+from response_store import get_response_store
+from canonical import canonicalize_profile
+from report_schema import finalize_reply, report_stats
+from prompt_engine import Prompt, count_tokens, max_completion_tokens, render_prompt
+from cohort_index import get_cohort_index, is_cohort
+from metrics import (
+    CACHE_REQUESTS, COMPLETION_TOKENS, ERRORS, PROMPT_TOKENS, PROMPT_TOKENS_ESTIMATED, PROMPT_TOKENS_SAVED,
+    PROMPT_TRUNCATIONS, STAGE_SECONDS,
+)
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple
 
 load_dotenv()
 
-def build_prompt(user_data: dict) -> str:
+logger = logging.getLogger(__name__)
+
+# Primary model; it names the cache key even when a hedge model answers
+MODEL = PRIMARY.model
+# max_completion_tokens is added per reply format by completion_params()
+COMPLETION_PARAMS = {"temperature": 0.7, "top_p": 1}
+
+# Structured mode asks for a JSON object that validates in one pass
+STRUCTURED_OUTPUT = os.getenv("REPORT_FORMAT", "json").lower() == "json"
+
+# Bucketing time_commitment trades a little precision for more cache hits
+BUCKET_TIME_COMMITMENT = os.getenv("PROFILE_BUCKET_TIME", "0").lower() in ("1", "true", "yes")
+
+# Upstream retries per call; each attempt waits its turn in the rate scheduler
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Backoff before retry n is drawn uniformly from [0, min(max, base * 2**n)]
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# Deadline for one call across all its attempts and backoffs, up to the first response byte
+LLM_TOTAL_TIMEOUT = float(os.getenv("LLM_TOTAL_TIMEOUT", "90"))
+
+# Identical in-flight prompts share one upstream call (per process)
+_flight = SingleFlight()
+_async_flight = AsyncSingleFlight()
+
+def build_prompt(user_data: dict, structured: bool = False) -> str:
     """
     Build the prompt for the LLM based on user data.
+    With structured=True the model is asked for a JSON object instead of text sections.
+    """
+    return render_prompt(user_data, structured).text
+
+def completion_params(structured: bool = False) -> Dict[str, Any]:
+    """
+    Sampling parameters plus a max_completion_tokens sized for the reply format.
+    """
+    return {**COMPLETION_PARAMS, "max_completion_tokens": max_completion_tokens(structured)}
+
+def route_params(route: Route, structured: bool = False) -> Dict[str, Any]:
+    """
+    completion_params() with the route's own overrides applied.
+    """
+    return {**completion_params(structured), **route.params}
+
+def canonical_request(user_data: dict, structured: bool = False) -> Tuple[str, str]:
+    """
+    Normalize the profile and return (prompt, cache key), so equivalent
+    profiles share cached answers and in-flight calls.
     """
-    return f"""
-    You are an expert career and salary advisor for IT students in India. Given the following user profile, generate a minimal report with:
-    1. A concise summary of the user's input (education, experience, skills, interests, goal, companies, learning style, time commitment, constraints) in a minimal, readable format.
-    2. A section titled 'Dream Job' that returns ONLY the most suitable job title (e.g., 'Full Stack Developer', 'Data Analyst', etc.) for the user based on their goal and background. Do NOT include any explanation or extra text.
-    3. A section titled 'Salary Potential' that returns ONLY the median annual salary number (in INR, e.g., '1200000') for that job in India, based on their background and skillset. Do NOT include any currency symbol, explanation, or extra text.
-    
-    Format your response as:
-    ---
-    User Summary:
-    <minimal summary here>
-    
-    Dream Job:
-    <job title only>
-    
-    Salary Potential:
-    <salary number only>
-    ---
-    
-    User Profile:
-    Education: {user_data['education']}
-    Experience: {user_data['experience']}
-    Technical Knowledge: {', '.join(user_data['tech_knowledge'])}
-    Interests: {user_data['interests']}
-    Career Goal: {user_data['goal']}
-    Dream Companies/Industries: {user_data['companies']}
-    Learning Style: {user_data['learning_style']}
-    Time Commitment: {user_data['time_commitment']} hours/week
-    Other Constraints: {user_data['other_constraints']}
-    """
-
-def get_llm_recommendation(user_data: dict) -> Dict[str, str]:
+    with STAGE_SECONDS.time(stage="build_prompt"):
+        rendered = _render(user_data, structured)
+    PROMPT_TOKENS_ESTIMATED.observe(rendered.tokens)
+    PROMPT_TOKENS_SAVED.observe(max(rendered.saved_tokens, 0))
+    if rendered.truncated:
+        for field in rendered.truncated:
+            PROMPT_TRUNCATIONS.inc(field=field)
+        logger.info("prompt fields truncated to budget: %s", ", ".join(rendered.truncated))
+    return rendered.text, prompt_key(rendered.text, MODEL, completion_params(structured))
+
+def _render(user_data: dict, structured: bool) -> Prompt:
+    return render_prompt(canonicalize_profile(user_data, bucket_time=BUCKET_TIME_COMMITMENT), structured)
+
+def cohort_key(user_data: dict) -> str:
+    """
+    Key of a cohort profile in the cohort index: the request hash in the
+    default reply format, whichever format the caller itself uses.
+    """
+    rendered = _render(user_data, STRUCTURED_OUTPUT)
+    return prompt_key(rendered.text, MODEL, completion_params(STRUCTURED_OUTPUT))
+
+def indexed_report(user_data: dict, key: str = None):
+    """
+    The precomputed report for a cohort profile (all free-text fields blank),
+    or None if the profile is not a cohort or its cohort was not built.
+    """
+    index = get_cohort_index()
+    if index is None or not is_cohort(user_data):
+        return None
+    result = index.get(key or cohort_key(user_data))
+    CACHE_REQUESTS.inc(cache="cohort", result="miss" if result is None else "hit")
+    return result
+
+def build_messages(prompt: str) -> list:
+    """
+    Wrap the prompt in the chat messages sent to the LLM.
+    """
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+def format_error(e: Exception) -> Dict[str, str]:
+    """
+    Turn an upstream exception into the error report returned to callers.
+    """
+    ERRORS.inc(error=type(e).__name__)
+    # More specific error handling for debugging and user feedback
+    import traceback
+    error_msg = f"Error communicating with GroqCloud API: {str(e)}\n{traceback.format_exc()}"
+    return {"report": error_msg}
+
+def _record_usage(usage) -> None:
+    if usage is not None:
+        PROMPT_TOKENS.observe(usage.prompt_tokens)
+        COMPLETION_TOKENS.observe(usage.completion_tokens)
+
+def _chunk_usage(chunk):
+    # Groq reports streaming usage on the final chunk under x_groq
+    if chunk.usage is not None:
+        return chunk.usage
+    return chunk.x_groq.usage if chunk.x_groq is not None else None
+
+def _usage_tokens(usage):
+    return usage.total_tokens if usage is not None else None
+
+def request_tokens(prompt: str, structured: bool = False) -> int:
+    """
+    Tokens reserved from the TPM budget for one call: the prompt plus the completion cap.
+    """
+    return count_tokens(prompt) + max_completion_tokens(structured)
+
+def _retry_delay(scheduler, e: Exception, attempt: int) -> float:
+    # A 429 pauses every caller in the scheduler, so there is nothing extra to sleep
+    if is_rate_limit(e):
+        scheduler.rate_limited(e.response.headers)
+        return 0.0
+    # Full jitter keeps callers that failed together from retrying together
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+def _upstream_failure(e: Exception) -> bool:
+    # 429s mean the model is up but we are over budget; the scheduler handles those
+    return isinstance(e, retryable_errors()) and not is_rate_limit(e)
+
+def _remaining(deadline: float, error: BaseException = None) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise error or TimeoutError(f"Groq call exceeded LLM_TOTAL_TIMEOUT ({LLM_TOTAL_TIMEOUT:g}s)")
+    return remaining
+
+def _open(priority: str, tokens: int, **kwargs):
+    """
+    Start a chat completion once the rate scheduler admits it, retrying 429s,
+    5xx and connection errors with jittered backoff within LLM_TOTAL_TIMEOUT.
+    Raises CircuitOpen while the model's breaker is open. Returns (response, ticket, requested_at); the
+    caller releases the ticket with the actual token usage.
+    """
+    scheduler = get_scheduler()
+    client = get_client()
+    breaker = get_breaker(kwargs["model"])
+    deadline = time.monotonic() + LLM_TOTAL_TIMEOUT
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        # Fail fast while the model's circuit is open, without queueing for budget
+        breaker.allow()
+        ticket = scheduler.acquire(tokens, priority)
+        requested_at = time.perf_counter()
+        try:
+            timeout = attempt_timeout(_remaining(deadline))
+            raw = client.chat.completions.with_raw_response.create(**kwargs, timeout=timeout)
+            response = raw.parse()
+        except retryable_errors() as e:
+            scheduler.release(ticket, used_tokens=0)
+            if _upstream_failure(e):
+                breaker.record_failure()
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _retry_delay(scheduler, e, attempt)
+            if delay >= _remaining(deadline, e):
+                raise
+            logger.warning("Groq call failed with %s, retry %d", type(e).__name__, attempt + 1)
+            time.sleep(delay)
+            continue
+        except BaseException:
+            scheduler.release(ticket)
+            raise
+        breaker.record_success()
+        scheduler.observe(raw.headers)
+        scheduler.succeeded()
+        return response, ticket, requested_at
+
+async def _open_async(priority: str, tokens: int, **kwargs):
+    """
+    Async variant of _open built on the shared AsyncGroq client.
+    """
+    scheduler = get_scheduler()
+    client = get_async_client()
+    breaker = get_breaker(kwargs["model"])
+    deadline = time.monotonic() + LLM_TOTAL_TIMEOUT
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        # Fail fast while the model's circuit is open, without queueing for budget
+        breaker.allow()
+        ticket = await scheduler.acquire_async(tokens, priority)
+        requested_at = time.perf_counter()
+        try:
+            timeout = attempt_timeout(_remaining(deadline))
+            raw = await client.chat.completions.with_raw_response.create(**kwargs, timeout=timeout)
+            response = await raw.parse()
+        except retryable_errors() as e:
+            scheduler.release(ticket, used_tokens=0)
+            if _upstream_failure(e):
+                breaker.record_failure()
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _retry_delay(scheduler, e, attempt)
+            if delay >= _remaining(deadline, e):
+                raise
+            logger.warning("Groq call failed with %s, retry %d", type(e).__name__, attempt + 1)
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            scheduler.release(ticket)
+            raise
+        breaker.record_success()
+        scheduler.observe(raw.headers)
+        scheduler.succeeded()
+        return response, ticket, requested_at
+
+def _ok(result: dict) -> bool:
+    return not result["report"].startswith("Error")
+
+def _fails_over(e: BaseException) -> bool:
+    # Another model or replica may answer when this one is down or overloaded; a 400 would fail there too
+    return isinstance(e, (CircuitOpen, *retryable_errors()))
+
+def _complete_route(route: Route, prompt: str, structured: bool, priority: str) -> dict:
+    extra = {"response_format": {"type": "json_object"}} if structured else {}
+    completion, ticket, requested_at = _open(
+        priority,
+        request_tokens(prompt, structured),
+        model=route.model,
+        messages=build_messages(prompt),
+        stream=False,
+        stop=None,
+        **route_params(route, structured),
+        **extra,
+    )
+    elapsed = time.perf_counter() - requested_at
+    STAGE_SECONDS.observe(elapsed, stage="completion")
+    latency_stats.observe(route.model, "completion", elapsed)
+    get_scheduler().release(ticket, _usage_tokens(completion.usage))
+    _record_usage(completion.usage)
+    llm_reply = completion.choices[0].message.content
+    with STAGE_SECONDS.time(stage="parse"):
+        return {**finalize_reply(llm_reply, structured), "model": route.model}
+
+async def _complete_route_async(route: Route, prompt: str, structured: bool, priority: str) -> dict:
+    extra = {"response_format": {"type": "json_object"}} if structured else {}
+    completion, ticket, requested_at = await _open_async(
+        priority,
+        request_tokens(prompt, structured),
+        model=route.model,
+        messages=build_messages(prompt),
+        stream=False,
+        stop=None,
+        **route_params(route, structured),
+        **extra,
+    )
+    elapsed = time.perf_counter() - requested_at
+    STAGE_SECONDS.observe(elapsed, stage="completion")
+    latency_stats.observe(route.model, "completion", elapsed)
+    get_scheduler().release(ticket, _usage_tokens(completion.usage))
+    _record_usage(completion.usage)
+    llm_reply = completion.choices[0].message.content
+    with STAGE_SECONDS.time(stage="parse"):
+        return {**finalize_reply(llm_reply, structured), "model": route.model}
+
+def _batch_route() -> Route:
+    # While the primary's circuit is open, batch work goes straight to the other model
+    if HEDGE.model != PRIMARY.model and not get_breaker(PRIMARY.model).available():
+        return HEDGE
+    return PRIMARY
+
+def _complete(prompt: str, structured: bool, priority: str = "interactive") -> dict:
+    # Hedging doubles some calls, so batch work stays on one model
+    if priority != "interactive":
+        return _complete_route(_batch_route(), prompt, structured, priority)
+    return hedged_sync(
+        lambda route: _complete_route(route, prompt, structured, priority), _ok, "completion",
+        can_hedge=get_scheduler().has_headroom, failover=_fails_over,
+    )
+
+async def _complete_async(prompt: str, structured: bool, priority: str = "interactive") -> dict:
+    if priority != "interactive":
+        return await _complete_route_async(_batch_route(), prompt, structured, priority)
+    return await hedged(
+        lambda route: _complete_route_async(route, prompt, structured, priority), _ok, "completion",
+        can_hedge=get_scheduler().has_headroom, failover=_fails_over,
+    )
+
+class _OpenStream:
+    """
+    A streaming completion that has already produced its first token.
+    `chunks` replays the buffered head of the stream, then continues it.
+    """
+
+    def __init__(self, route: Route, stream, chunks, ticket, first_token_at: float):
+        self.route = route
+        self.stream = stream
+        self.chunks = chunks
+        self.ticket = ticket
+        self.first_token_at = first_token_at
+
+def _has_content(chunk) -> bool:
+    return bool(chunk.choices and chunk.choices[0].delta.content)
+
+def _first_token(route: Route, requested_at: float) -> float:
+    first_token_at = time.perf_counter()
+    STAGE_SECONDS.observe(first_token_at - requested_at, stage="ttft")
+    latency_stats.observe(route.model, "ttft", first_token_at - requested_at)
+    return first_token_at
+
+def _open_stream(route: Route, prompt: str) -> _OpenStream:
+    stream, ticket, requested_at = _open(
+        "interactive",
+        request_tokens(prompt),
+        model=route.model,
+        messages=build_messages(prompt),
+        stream=True,
+        stop=None,
+        **route_params(route),
+    )
+    iterator = iter(stream)
+    head = []
+    try:
+        for chunk in iterator:
+            head.append(chunk)
+            if _has_content(chunk):
+                break
+    except BaseException:
+        stream.close()
+        get_scheduler().release(ticket)
+        raise
+    return _OpenStream(route, stream, itertools.chain(head, iterator), ticket, _first_token(route, requested_at))
+
+def _discard_stream(opened: _OpenStream) -> None:
+    opened.stream.close()
+    get_scheduler().release(opened.ticket)
+
+async def _achain(head: list, iterator) -> AsyncIterator:
+    for chunk in head:
+        yield chunk
+    async for chunk in iterator:
+        yield chunk
+
+async def _open_stream_async(route: Route, prompt: str) -> _OpenStream:
+    stream, ticket, requested_at = await _open_async(
+        "interactive",
+        request_tokens(prompt),
+        model=route.model,
+        messages=build_messages(prompt),
+        stream=True,
+        stop=None,
+        **route_params(route),
+    )
+    iterator = stream.__aiter__()
+    head = []
+    try:
+        async for chunk in iterator:
+            head.append(chunk)
+            if _has_content(chunk):
+                break
+    except BaseException:
+        await stream.close()
+        get_scheduler().release(ticket)
+        raise
+    return _OpenStream(route, stream, _achain(head, iterator), ticket, _first_token(route, requested_at))
+
+async def _close_stream_async(opened: _OpenStream) -> None:
+    await opened.stream.close()
+
+def _discard_stream_async(opened: _OpenStream) -> None:
+    get_scheduler().release(opened.ticket)
+    asyncio.ensure_future(_close_stream_async(opened))
+
+def _cached(key: str):
+    store = get_response_store()
+    if store is None:
+        return None
+    result = store.get(key)
+    CACHE_REQUESTS.inc(cache="response", result="miss" if result is None else "hit")
+    return result
+
+async def _cached_async(key: str):
+    # Opening the store and reading it can wait out sqlite's busy timeout on
+    # another writer's lock, so neither happens on the event loop
+    return await asyncio.to_thread(_cached, key)
+
+def _remember(key: str, result: dict, user_data: dict) -> dict:
+    # Never persist failures or incomplete reports, the next request should retry
+    if result["report"].startswith("Error") or missing_sections(parse_sections(result["report"])):
+        return result
+    store = get_response_store()
+    if store is not None:
+        store.set(key, result)
+    # Imported here: NumPy stays out of startup until the first fresh report
+    from salary_index import get_salary_index
+    index = get_salary_index()
+    if index is not None:
+        index.record(user_data, result)
+    return result
+
+def get_llm_recommendation(user_data: dict, priority: str = "interactive", skip_cohort: bool = False) -> Dict[str, Any]:
     """
     Calls GroqCloud LLM API with user data and returns the structured recommendation.
-    Returns a dict with a 'report' key containing the LLM's reply or an error message.
+    Returns a dict with a 'report' key containing the LLM's reply or an error message,
+    plus a 'structured' key with the typed sections when the JSON reply validated.
+    Concurrent calls for the same prompt share one upstream request.
+    priority is the rate scheduler class: 'interactive' or 'batch'.
+    skip_cohort=True skips the cohort index, for callers that already checked it.
     """
     api_key = os.getenv("GROQCLOUD_API_KEY")
     if not api_key:
         return {"report": "Error: GROQCLOUD_API_KEY not set in environment."}
-    client = Groq(api_key=api_key)
-    prompt = build_prompt(user_data)
+    prompt, key = canonical_request(user_data, STRUCTURED_OUTPUT)
+    cached = (None if skip_cohort else indexed_report(user_data, key)) or _cached(key)
+    if cached is not None:
+        return cached
+    try:
+        return _flight.do(key, lambda: _remember(key, _complete(prompt, STRUCTURED_OUTPUT, priority), user_data))
+    except Exception as e:
+        return format_error(e)
+
+async def get_llm_recommendation_async(user_data: dict, priority: str = "interactive", skip_cohort: bool = False) -> Dict[str, Any]:
+    """
+    Async variant of get_llm_recommendation built on the shared AsyncGroq client.
+    Waiting on the LLM does not hold a threadpool worker.
+    """
+    api_key = os.getenv("GROQCLOUD_API_KEY")
+    if not api_key:
+        return {"report": "Error: GROQCLOUD_API_KEY not set in environment."}
+    prompt, key = canonical_request(user_data, STRUCTURED_OUTPUT)
+    cached = (None if skip_cohort else indexed_report(user_data, key)) or await _cached_async(key)
+    if cached is not None:
+        return cached
+
+    async def complete() -> dict:
+        result = await _complete_async(prompt, STRUCTURED_OUTPUT, priority)
+        return await asyncio.to_thread(_remember, key, result, user_data)
+
+    try:
+        return await _async_flight.do(key, complete)
+    except Exception as e:
+        return format_error(e)
+
+def cache_stats() -> Dict[str, int]:
+    """
+    Hit/miss/eviction counters for the persistent response cache.
+    """
+    store = get_response_store()
+    return store.stats() if store is not None else {}
+
+def record_retry() -> None:
+    """
+    Count a user-triggered regeneration of a report.
+    """
+    report_stats.incr("retries")
+
+def report_format_stats() -> Dict[str, int]:
+    """
+    How often structured replies validated, fell back to the text parser,
+    came back incomplete, or were retried.
+    """
+    return report_stats.snapshot()
+
+def scheduler_stats() -> Dict[str, Any]:
+    """
+    Rate scheduler state: budgets left, queue depth per priority, concurrency limit, 429s.
+    """
+    return get_scheduler().stats()
+
+def model_stats() -> Dict[str, Any]:
+    """
+    Configured models, current hedge thresholds and per-model latency percentiles.
+    """
+    return routing_stats()
+
+def circuit_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Circuit breaker state, recent calls and failures per model.
+    """
+    return breaker_stats()
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Leader vs coalesced request counters for the sync and async single-flight groups.
+    """
+    return {"sync": _flight.stats(), "async": _async_flight.stats()}
+
+def _section_event(name: str, content: str, started: float) -> dict:
+    return {
+        "type": "section",
+        "name": name,
+        "content": content,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def _done_event(report: str, started: float, first_section_at) -> dict:
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    ttfc_ms = None
+    if first_section_at:
+        # Time to first chunk: what the user waits before any section renders
+        STAGE_SECONDS.observe(first_section_at - started, stage="ttfc")
+        ttfc_ms = round((first_section_at - started) * 1000, 1)
+    logger.info("report streamed: ttfc_ms=%s total_ms=%s", ttfc_ms, total_ms)
+    return {"type": "done", "report": report, "ttfc_ms": ttfc_ms, "total_ms": total_ms}
+
+def _replay_events(result: dict, started: float) -> Iterator[dict]:
+    # Followers of a coalesced stream get the leader's finished report all at once
+    report = result["report"]
+    if report.startswith("Error"):
+        yield {"type": "error", "report": report}
+        return
+    parser = SectionStream()
+    sections = list(parser.feed(report)) + list(parser.close())
+    for name, content in sections:
+        yield _section_event(name, content, started)
+    yield _done_event(report, started, time.perf_counter() if sections else None)
+
+def stream_llm_recommendation(user_data: dict, skip_cohort: bool = False) -> Iterator[dict]:
+    """
+    Streams the report section by section.
+    Yields {'type': 'section', ...} events as soon as each section is complete, then a
+    final {'type': 'done', 'report', 'ttfc_ms', 'total_ms'} event, or {'type': 'error', 'report'}.
+    """
+    started = time.perf_counter()
+    api_key = os.getenv("GROQCLOUD_API_KEY")
+    if not api_key:
+        yield {"type": "error", "report": "Error: GROQCLOUD_API_KEY not set in environment."}
+        return
+    prompt, key = canonical_request(user_data)
+    cached = (None if skip_cohort else indexed_report(user_data)) or _cached(key)
+    if cached is not None:
+        yield from _replay_events(cached, started)
+        return
+    call, leader = _flight.join(key)
+    if not leader:
+        try:
+            result = call.wait()
+        except Exception as e:
+            result = format_error(e)
+        yield from _replay_events(result, started)
+        return
+    parser = SectionStream()
+    first_section_at = None
+    result = None
+    opened = None
+    usage = None
+    finished = False
+    try:
+        # The first stream to produce a token wins
+        opened = hedged_sync(
+            lambda route: _open_stream(route, prompt), bool, "ttft", _discard_stream,
+            can_hedge=get_scheduler().has_headroom, failover=_fails_over,
+        )
+        for chunk in opened.chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            usage = _chunk_usage(chunk) or usage
+            for name, content in parser.feed(delta or ""):
+                first_section_at = first_section_at or time.perf_counter()
+                yield _section_event(name, content, started)
+        finished = True
+        for name, content in parser.close():
+            first_section_at = first_section_at or time.perf_counter()
+            yield _section_event(name, content, started)
+        STAGE_SECONDS.observe(time.perf_counter() - opened.first_token_at, stage="generation")
+        _record_usage(usage)
+        with STAGE_SECONDS.time(stage="parse"):
+            result = _remember(key, {**finalize_reply(parser.text, structured=False), "model": opened.route.model}, user_data)
+    except Exception as e:
+        result = format_error(e)
+        yield {"type": "error", **result}
+        return
+    finally:
+        if opened is not None:
+            get_scheduler().release(opened.ticket, _usage_tokens(usage))
+            if not finished:
+                # Stopped early or failed mid-stream: drop the half-read upstream connection
+                opened.stream.close()
+        if result is None:
+            _flight.finish(key, call, error=RuntimeError("stream closed before completion"))
+        else:
+            _flight.finish(key, call, result)
+    yield _done_event(parser.text, started, first_section_at)
+
+async def stream_llm_recommendation_async(user_data: dict, skip_cohort: bool = False) -> AsyncIterator[dict]:
+    """
+    Async variant of stream_llm_recommendation built on the shared AsyncGroq client.
+    """
+    started = time.perf_counter()
+    api_key = os.getenv("GROQCLOUD_API_KEY")
+    if not api_key:
+        yield {"type": "error", "report": "Error: GROQCLOUD_API_KEY not set in environment."}
+        return
+    prompt, key = canonical_request(user_data)
+    cached = (None if skip_cohort else indexed_report(user_data)) or await _cached_async(key)
+    if cached is not None:
+        for event in _replay_events(cached, started):
+            yield event
+        return
+    future, leader = _async_flight.join(key)
+    if not leader:
+        try:
+            result = await asyncio.shield(future)
+        except Exception as e:
+            result = format_error(e)
+        for event in _replay_events(result, started):
+            yield event
+        return
+    parser = SectionStream()
+    first_section_at = None
+    result = None
+    opened = None
+    usage = None
+    finished = False
     try:
-        completion = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_completion_tokens=800,
-            top_p=1,
-            stream=False,
-            stop=None,
+        # The first stream to produce a token wins
+        opened = await hedged(
+            lambda route: _open_stream_async(route, prompt), bool, "ttft", _discard_stream_async,
+            can_hedge=get_scheduler().has_headroom, failover=_fails_over,
         )
-        llm_reply = completion.choices[0].message.content
-        return {"report": llm_reply}
+        async for chunk in opened.chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            usage = _chunk_usage(chunk) or usage
+            for name, content in parser.feed(delta or ""):
+                first_section_at = first_section_at or time.perf_counter()
+                yield _section_event(name, content, started)
+        finished = True
+        for name, content in parser.close():
+            first_section_at = first_section_at or time.perf_counter()
+            yield _section_event(name, content, started)
+        STAGE_SECONDS.observe(time.perf_counter() - opened.first_token_at, stage="generation")
+        _record_usage(usage)
+        with STAGE_SECONDS.time(stage="parse"):
+            reply = {**finalize_reply(parser.text, structured=False), "model": opened.route.model}
+            result = await asyncio.to_thread(_remember, key, reply, user_data)
     except Exception as e:
-        # More specific error handling for debugging and user feedback
-        import traceback
-        error_msg = f"Error communicating with GroqCloud API: {str(e)}\n{traceback.format_exc()}"
-        return {"report": error_msg} 
\ No newline at end of file
+        result = format_error(e)
+        yield {"type": "error", **result}
+        return
+    finally:
+        if opened is not None:
+            get_scheduler().release(opened.ticket, _usage_tokens(usage))
+            if not finished:
+                # Stopped early or failed mid-stream: drop the half-read upstream connection
+                await opened.stream.close()
+        if result is None:
+            _async_flight.finish(key, future, error=RuntimeError("stream closed before completion"))
+        else:
+            _async_flight.finish(key, future, result)
+    yield _done_event(parser.text, started, first_section_at)
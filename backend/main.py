@@ -1,10 +1,107 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from llm_utils import get_llm_recommendation
-from typing import Dict
+from llm_utils import cache_stats, circuit_stats, coalescing_stats, indexed_report, model_stats, report_format_stats, scheduler_stats, get_llm_recommendation, get_llm_recommendation_async, stream_llm_recommendation_async
+from groq_client import close_async_client, close_client, warm_up
+from concurrency import Overloaded, limiter_from_env
+from circuit_breaker import STATE_VALUES
+from capture import get_capture
+from batch import iter_lines, run_batch
+from job_store import DONE, FAILED, get_job_store
+from job_worker import JobWorkers
+from rate_scheduler import PRIORITIES
+import metrics
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
 
-app = FastAPI()
+# In-process job workers; set JOB_WORKERS=0 to run them only via job_worker.py
+job_workers = JobWorkers(get_job_store(), int(os.getenv("JOB_WORKERS", "16")))
+
+logger = logging.getLogger(__name__)
+
+def _warm_up() -> None:
+    """
+    Loads what the first report needs (Groq SDK and clients, NumPy for the
+    estimate) in the background, so /health answers before it is loaded.
+    """
+    try:
+        import estimator  # noqa: F401
+        warm_up()
+    except Exception:
+        logger.exception("warm-up failed; clients will be built on first use")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if job_workers.concurrency > 0:
+        job_workers.start()
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+    await job_workers.stop()
+    # Release the pooled Groq connections
+    close_client()
+    await close_async_client()
+
+app = FastAPI(lifespan=lifespan)
+
+# Bounds concurrent Groq calls and the queue waiting for them
+limiter = limiter_from_env()
+
+# Serve the offline estimate instead of failing when Groq errors or we are overloaded
+ESTIMATE_FALLBACK = os.getenv("ESTIMATE_FALLBACK", "1").lower() in ("1", "true", "yes")
+
+def _collect() -> list:
+    """Gauges read at scrape time from the limiter, caches and counters."""
+    limiter_stats = limiter.stats()
+    coalescing = coalescing_stats()
+    cache = cache_stats()
+    scheduler = scheduler_stats()
+    routing = model_stats()
+    circuits = circuit_stats()
+    return [
+        ("llm_limiter_in_flight", "gauge", "Upstream calls currently in flight.", [({}, limiter_stats["in_flight"])]),
+        ("llm_limiter_waiting", "gauge", "Requests waiting for an in-flight slot.", [({}, limiter_stats["waiting"])]),
+        ("llm_limiter_rejected_total", "counter", "Requests shed by the admission limiter.", [({}, limiter_stats["rejected"])]),
+        ("llm_singleflight_total", "counter", "Single-flight requests by group and role.", [
+            ({"group": group, "role": role}, stats[role])
+            for group, stats in coalescing.items() for role in ("leaders", "coalesced")
+        ]),
+        ("llm_response_cache_entries", "gauge", "Entries in the persistent response cache.", [({}, cache.get("size", 0))]),
+        ("llm_response_cache_evictions_total", "counter", "Evictions from the persistent response cache.", [({}, cache.get("evictions", 0))]),
+        ("llm_scheduler_in_flight", "gauge", "Upstream calls admitted by the rate scheduler.", [({}, scheduler["in_flight"])]),
+        ("llm_scheduler_concurrency_limit", "gauge", "Adaptive upstream concurrency limit.", [({}, scheduler["concurrency_limit"])]),
+        ("llm_scheduler_queued", "gauge", "Calls waiting for rate budget, by priority.", [
+            ({"priority": priority}, count) for priority, count in scheduler["queued"].items()
+        ]),
+        ("llm_scheduler_tokens_available", "gauge", "Tokens left in the TPM bucket.", [({}, scheduler["tokens_available"] or 0)]),
+        ("llm_hedge_delay_seconds", "gauge", "Primary-model wait before a hedge is sent.", [
+            ({"kind": kind}, delay) for kind, delay in routing["hedge_delay"].items()
+        ]),
+        ("llm_circuit_state", "gauge", "Circuit breaker state by model (0 closed, 1 half-open, 2 open).", [
+            ({"model": model}, STATE_VALUES[stats["state"]]) for model, stats in circuits.items()
+        ]),
+        ("report_jobs", "gauge", "Report jobs in the job store by status.", [
+            ({"status": status}, count) for status, count in get_job_store().stats().items()
+        ]),
+        ("llm_report_outcomes_total", "counter", "Report parsing outcomes (json_ok, json_fallback, text_ok, incomplete, retries).", [
+            ({"outcome": outcome}, count) for outcome, count in report_format_stats().items()
+        ]),
+    ]
+
+metrics.register_collector(_collect)
+
+# Longest a GET /recommend/jobs/{id}?wait= long-poll is held open
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
+
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
 
 # Allow CORS for local frontend development
 app.add_middleware(
@@ -15,6 +112,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    """Shed load with a fast 503 instead of queueing without limit."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that keeps reading the request body while it responds.
+    The stock class listens for disconnects on receive(), which would swallow body chunks.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse holding an admission slot taken before it was built.
+    The slot is released once the response is sent or fails, even if the
+    body iterator never started (e.g. the client was already gone).
+    """
+
+    def __init__(self, content, release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Static files whose URLs carry a content hash (?v=...): those can be cached
+    for a year without revalidation. Unversioned URLs are revalidated.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+# The Streamlit logo and font, for deployments that set ASSET_BASE_URL to <backend>/static
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static"))
+app.mount("/static", ImmutableStaticFiles(directory=STATIC_DIR, check_dir=False), name="static")
+
+def _estimate(user_data: dict) -> Dict[str, Any]:
+    # Imported on first use (or by the warm-up) to keep NumPy out of startup
+    from estimator import estimate_result
+    return estimate_result(user_data)
+
 class UserData(BaseModel):
     education: str
     experience: str
@@ -36,8 +193,204 @@ def health_check() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/coalescing")
+def coalescing() -> Dict[str, Dict[str, int]]:
+    """Leader vs coalesced counters for identical in-flight prompts."""
+    return coalescing_stats()
+
+@app.get("/stats/cache")
+def cache() -> Dict[str, int]:
+    """Hit/miss/eviction counters for the persistent response cache."""
+    return cache_stats()
+
+@app.get("/stats/scheduler")
+def scheduler() -> Dict[str, Any]:
+    """Rate budgets left, queued calls per priority and the adaptive concurrency limit."""
+    return scheduler_stats()
+
+@app.get("/stats/models")
+def models() -> Dict[str, Any]:
+    """Configured models, hedge thresholds and per-model latency percentiles."""
+    return model_stats()
+
+@app.get("/stats/circuits")
+def circuits() -> Dict[str, Dict[str, Any]]:
+    """Circuit breaker state and recent failures per model."""
+    return circuit_stats()
+
+@app.get("/stats/reports")
+def reports() -> Dict[str, int]:
+    """How often structured replies validated, fell back, were incomplete or retried."""
+    return report_format_stats()
+
+def _salary_index():
+    # Imported on first use to keep NumPy out of startup
+    from salary_index import get_salary_index
+    index = get_salary_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="The salary index is disabled (SALARY_INDEX_PATH=off).")
+    return index
+
+@app.get("/stats/salaries")
+def salaries(
+    group_by: Optional[str] = None,
+    goal: Optional[str] = None,
+    education: Optional[str] = None,
+    learning_style: Optional[str] = None,
+    skills: str = "",
+    since_days: float = 0,
+    percentiles: str = "10,25,50,75,90",
+    top: int = 20,
+) -> Dict[str, Any]:
+    """
+    Salary percentiles (LPA) over all generated reports, optionally filtered
+    and grouped by goal, education, learning_style, skill or role. Never calls
+    the LLM. skills is comma-separated; a report must list all of them.
+    """
+    from salary_index import GROUP_BY
+    if group_by is not None and group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUP_BY)}")
+    try:
+        wanted = [float(q) for q in percentiles.split(",") if q.strip()]
+    except ValueError:
+        wanted = []
+    if not wanted or not all(0 <= q <= 100 for q in wanted):
+        raise HTTPException(status_code=400, detail="percentiles must be comma-separated numbers between 0 and 100.")
+    index = _salary_index()
+    return index.salary_stats(
+        group_by=group_by,
+        percentiles=wanted,
+        top=max(top, 1),
+        goal=goal,
+        education=education,
+        learning_style=learning_style,
+        skills=[s.strip() for s in skills.split(",") if s.strip()],
+        since=time.time() - since_days * 86400 if since_days > 0 else None,
+    )
+
+class PeerRequest(BaseModel):
+    user_data: UserData
+    salary_range: str
+
+@app.post("/stats/peers")
+def peers(request: PeerRequest) -> Dict[str, Any]:
+    """
+    Where a report's salary range falls among reports for the same goal and
+    education (or goal alone when that cohort is small). 404 without enough peers.
+    """
+    comparison = _salary_index().compare(request.user_data.dict(), request.salary_range)
+    if comparison is None:
+        raise HTTPException(status_code=404, detail="Not enough peer reports, or no salary range found.")
+    return comparison
+
+def _captured(user_data: UserData, started: float, result: Dict[str, Any], served_from: str) -> Dict[str, Any]:
+    """Hands the request to the traffic capture, if enabled, and returns the result."""
+    capture = get_capture()
+    if capture is not None:
+        capture.record("api", user_data.dict(), time.perf_counter() - started, result, served_from)
+    return result
+
 @app.post("/recommend")
-def recommend(user_data: UserData) -> Dict[str, str]:
-    """Generate a career and salary recommendation report."""
+async def recommend(user_data: UserData, tier: str = "llm") -> Dict[str, Any]:
+    """
+    Generate a career and salary recommendation report.
+    tier=estimate returns the instant offline estimate without calling the LLM.
+    """
+    if tier == "estimate":
+        return _estimate(user_data.dict())
+    started = time.perf_counter()
+    # Precomputed cohorts are served even when the limiter would shed the request
+    indexed = indexed_report(user_data.dict())
+    if indexed is not None:
+        return _captured(user_data, started, indexed, "cohort")
+    try:
+        async with limiter.slot():
+            llm_result = await get_llm_recommendation_async(user_data.dict(), skip_cohort=True)
+    except Overloaded:
+        if not ESTIMATE_FALLBACK:
+            raise
+        return _captured(user_data, started, {**_estimate(user_data.dict()), "degraded": True}, "estimate")
+    if ESTIMATE_FALLBACK and llm_result["report"].startswith("Error"):
+        return _captured(user_data, started, {**_estimate(user_data.dict()), "degraded": True}, "estimate")
+    return _captured(user_data, started, llm_result, "llm")
+
+@app.post("/recommend/sync")
+def recommend_sync(user_data: UserData) -> Dict[str, Any]:
+    """Blocking variant of /recommend that runs on the threadpool."""
     llm_result = get_llm_recommendation(user_data.dict())
-    return llm_result 
\ No newline at end of file
+    return llm_result
+
+@app.post("/recommend/stream")
+async def recommend_stream(user_data: UserData) -> StreamingResponse:
+    """
+    Stream the report as NDJSON: an instant 'preview' event with the offline
+    estimate, one event per completed section, then a final 'done' event
+    carrying the full report and time-to-first-content.
+    """
+    # Take the slot before responding so overload still gets a proper 503
+    await limiter.acquire()
+
+    async def events() -> AsyncIterator[str]:
+        yield json.dumps({"type": "preview", **_estimate(user_data.dict())}, ensure_ascii=False) + "\n"
+        async for event in stream_llm_recommendation_async(user_data.dict()):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return SlotStreamingResponse(events(), limiter.release, media_type="application/x-ndjson")
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: Request, concurrency: int = BATCH_DEFAULT_CONCURRENCY) -> DuplexStreamingResponse:
+    """
+    Generate reports for a JSONL request body of UserData records.
+    Results stream back as NDJSON in completion order, each with its input 'index'.
+    """
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+
+    async def recommend_one(record: dict) -> Dict[str, Any]:
+        user_data = UserData(**record)
+        # Batch work backs off instead of failing when interactive traffic fills the queue
+        while True:
+            try:
+                async with limiter.slot():
+                    return await get_llm_recommendation_async(user_data.dict(), priority="batch")
+            except Overloaded as exc:
+                await asyncio.sleep(exc.retry_after)
+
+    async def results() -> AsyncIterator[str]:
+        async for result in run_batch(iter_lines(request.stream()), recommend_one, concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/recommend/jobs", status_code=202)
+async def submit_job(user_data: UserData, priority: str = "interactive") -> JSONResponse:
+    """
+    Queue a report and return its job id at once, instead of holding the
+    connection for the whole LLM call. Poll GET /recommend/jobs/{id} for the result.
+    """
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of: {', '.join(PRIORITIES)}")
+    job_id = await asyncio.to_thread(get_job_store().submit, user_data.dict(), priority)
+    job_workers.notify()
+    url = f"/recommend/jobs/{job_id}"
+    return JSONResponse(status_code=202, content={"id": job_id, "status": "queued", "url": url}, headers={"Location": url})
+
+@app.get("/recommend/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0) -> Dict[str, Any]:
+    """
+    Job status, plus the report once it is done.
+    wait=N long-polls for up to N seconds (capped at JOB_MAX_WAIT) until the job finishes.
+    """
+    deadline = time.monotonic() + min(max(wait, 0.0), JOB_MAX_WAIT)
+    store = get_job_store()
+    while True:
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job id.")
+        if job["status"] in (DONE, FAILED) or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(0.25)
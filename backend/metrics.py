@@ -0,0 +1,145 @@
+"""
+Minimal in-process Prometheus metrics.
+
+Counters and histograms are plain dicts behind a lock, cheap enough to leave
+on in production. Values that already live elsewhere (cache sizes, limiter
+state) are read at scrape time through registered collectors.
+render() produces the Prometheus text exposition format for GET /metrics.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # label key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {row[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+# A collector returns (name, type, help, [(labels, value), ...]) tuples at scrape time
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[Dict[str, object], float]]]]]
+
+_metrics: List[object] = []
+_collectors: List[Collector] = []
+
+
+def counter(name: str, help: str) -> Counter:
+    metric = Counter(name, help)
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, help: str, buckets=LATENCY_BUCKETS) -> Histogram:
+    metric = Histogram(name, help, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Collector) -> None:
+    _collectors.append(collector)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines += metric.render()
+    for collector in _collectors:
+        for name, kind, help, samples in collector():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_format_labels(_key(labels))} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+# --- Metrics shared across the LLM pipeline ---
+STAGE_SECONDS = histogram(
+    "llm_stage_seconds",
+    "Latency of each report pipeline stage (build_prompt, queue, schedule, completion, ttft, ttfc, generation, parse).",
+)
+PROMPT_TOKENS = histogram("llm_prompt_tokens", "Prompt tokens per request, from the usage block.", TOKEN_BUCKETS)
+COMPLETION_TOKENS = histogram("llm_completion_tokens", "Completion tokens per request, from the usage block.", TOKEN_BUCKETS)
+PROMPT_TOKENS_ESTIMATED = histogram("llm_prompt_tokens_estimated", "Estimated prompt tokens at build time.", TOKEN_BUCKETS)
+PROMPT_TOKENS_SAVED = histogram(
+    "llm_prompt_tokens_saved", "Estimated prompt tokens saved versus the uncompacted template.", TOKEN_BUCKETS,
+)
+PROMPT_TRUNCATIONS = counter("llm_prompt_truncations_total", "Profile fields cut to their token budget.")
+CACHE_REQUESTS = counter("llm_cache_requests_total", "Response cache lookups by cache and result (hit/miss).")
+ERRORS = counter("llm_errors_total", "Upstream LLM errors by exception class.")
@@ -0,0 +1,90 @@
+"""
+Speculative report prefetch for the Streamlit stepper.
+
+By the end of step 8 the profile is complete except for the optional
+other_constraints, which most users leave empty. The report for that
+profile is generated in the background while the user is on step 9; when
+they ask for suggestions with the same (canonical) profile the running or
+finished call is adopted, otherwise it is cancelled or, if already running,
+left to finish into the shared caches and counted as wasted. An adopted call
+whose result cannot be shown (an error or a fallback estimate) counts as
+failed rather than as a hit, since the report is generated again.
+"""
+
+import threading
+from concurrent import futures
+from typing import Any, Callable, Dict, Optional
+
+from canonical import canonicalize_profile
+from metrics import counter
+
+PREFETCHES = counter("report_prefetch_total", "Speculative report prefetches by outcome (started, hit, failed, wasted, cancelled).")
+
+
+class Prefetch:
+    """One speculative call: the profile it was started for and its future."""
+
+    __slots__ = ("profile", "future")
+
+    def __init__(self, profile: dict, future: futures.Future):
+        self.profile = profile
+        self.future = future
+
+
+class Prefetcher:
+    """
+    Runs fetch(user_data) on a small thread pool and hands the result to the
+    first matching claim() if usable(result) accepts it.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[dict], Dict[str, Any]],
+        usable: Callable[[Dict[str, Any]], bool] = lambda result: True,
+        max_workers: int = 8,
+    ):
+        self.fetch = fetch
+        self.usable = usable
+        self._pool = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._counts = {"started": 0, "hit": 0, "failed": 0, "wasted": 0, "cancelled": 0}
+
+    def _count(self, outcome: str) -> None:
+        PREFETCHES.inc(outcome=outcome)
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def start(self, user_data: dict) -> Prefetch:
+        self._count("started")
+        return Prefetch(canonicalize_profile(user_data), self._pool.submit(self.fetch, dict(user_data)))
+
+    def claim(self, prefetch: Optional[Prefetch], user_data: dict) -> Optional[Dict[str, Any]]:
+        """
+        Waits for and returns the prefetch's result if it was started for this
+        profile and is usable; otherwise discards it and returns None.
+        """
+        if prefetch is None:
+            return None
+        if prefetch.profile != canonicalize_profile(user_data):
+            self.discard(prefetch)
+            return None
+        try:
+            result = prefetch.future.result()
+        except Exception:
+            result = None
+        if result is None or not self.usable(result):
+            self._count("failed")
+            return None
+        self._count("hit")
+        return result
+
+    def discard(self, prefetch: Optional[Prefetch]) -> None:
+        """Drops a prefetch that will not be used, cancelling it if it has not started."""
+        if prefetch is None:
+            return
+        # A call already running cannot be interrupted; its result still lands in the caches
+        self._count("cancelled" if prefetch.future.cancel() else "wasted")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
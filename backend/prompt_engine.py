@@ -0,0 +1,157 @@
+"""
+Compact prompt engine with token budgets.
+
+The template is compiled once, whitespace-minimal, and lists the NxtWave
+courses a single time. Free-text fields are condensed and truncated to
+per-field budgets, the whole prompt is held to a total budget, and
+max_completion_tokens is derived from the expected size of the reply
+rather than a fixed 800.
+
+Token counts are estimated at ~4 characters per token, which tracks the
+Llama tokenizer closely enough for budgeting without loading it.
+"""
+
+import math
+import os
+import re
+from typing import Dict, List, NamedTuple
+
+from report_schema import JSON_FORMAT_INSTRUCTIONS
+
+NXTWAVE_COURSES = [
+    "NxtWave MERN Stack Developer Course",
+    "NxtWave Full-Stack Developer Course",
+    "NxtWave Data Analytics Course",
+    "NxtWave QA/Automation Testing Course",
+]
+
+# Estimated tokens of the original indented f-string template (app.py's build_prompt
+# before this module) rendered with every field empty: 1781 characters, ceil(1781 / 4)
+LEGACY_TEMPLATE_TOKENS = 446
+
+TEXT_FORMAT_INSTRUCTIONS = """Format exactly:
+---
+Estimated Salary Range:
+<range>
+Roles They Can Aim For:
+<one per line>
+Skills They're Missing:
+<one per line>
+Suggested Learning Tracks:
+1. <our course>
+2. <other>
+ROI of Upskilling:
+<roi>
+---"""
+
+_TEMPLATE = (
+    "You are an expert career and salary advisor for IT students in India. "
+    "Write a concise, actionable report for the profile below. "
+    "Always include all 5 sections; guess sensibly if unsure; no extra commentary.\n"
+    "1. Estimated Salary Range: INR LPA, e.g. ₹6–10 LPA\n"
+    "2. Roles They Can Aim For: 2-3 job titles\n"
+    "3. Skills They're Missing: 3-5 skills\n"
+    "4. Suggested Learning Tracks: 2-3 tracks; #1 MUST be the most relevant of: " + "; ".join(NXTWAVE_COURSES) + "\n"
+    "5. ROI of Upskilling: e.g. Increase salary by 80% in 6 months\n"
+    "{format}\n"
+    "Profile:\n"
+    "Education: {education}\n"
+    "Experience: {experience}\n"
+    "Technical Knowledge: {tech_knowledge}\n"
+    "Interests: {interests}\n"
+    "Career Goal: {goal}\n"
+    "Dream Companies/Industries: {companies}\n"
+    "Learning Style: {learning_style}\n"
+    "Time Commitment: {time_commitment} hours/week\n"
+    "Other Constraints: {other_constraints}"
+)
+
+FIELD_BUDGETS = {
+    "experience": int(os.getenv("PROMPT_BUDGET_EXPERIENCE", "60")),
+    "tech_knowledge": int(os.getenv("PROMPT_BUDGET_TECH", "40")),
+    "interests": int(os.getenv("PROMPT_BUDGET_INTERESTS", "60")),
+    "companies": int(os.getenv("PROMPT_BUDGET_COMPANIES", "40")),
+    "other_constraints": int(os.getenv("PROMPT_BUDGET_CONSTRAINTS", "60")),
+}
+TOTAL_BUDGET = int(os.getenv("PROMPT_BUDGET_TOTAL", "600"))
+
+# Typical reply sizes in tokens, plus headroom so replies are not cut off
+EXPECTED_OUTPUT_TOKENS = {"text": 320, "json": 300}
+OUTPUT_HEADROOM = float(os.getenv("PROMPT_OUTPUT_HEADROOM", "1.5"))
+
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+    truncated: List[str]
+    saved_tokens: int
+
+
+def count_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def condense(text: str) -> str:
+    """
+    Collapse whitespace and drop repeated comma/semicolon-separated items.
+    """
+    text = " ".join(str(text or "").split())
+    parts = [p.strip() for p in re.split(r"[;,]", text)]
+    if len(parts) > 1:
+        unique = {}
+        for part in parts:
+            if part and part.lower() not in unique:
+                unique[part.lower()] = part
+        text = ", ".join(unique.values())
+    return text
+
+
+def truncate(text: str, budget: int) -> str:
+    """
+    Cut text to roughly `budget` tokens at a word boundary.
+    """
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0] or text[:limit]
+    return cut.rstrip(",;. ") + "…"
+
+
+def max_completion_tokens(structured: bool) -> int:
+    return int(EXPECTED_OUTPUT_TOKENS["json" if structured else "text"] * OUTPUT_HEADROOM)
+
+
+def render_prompt(profile: dict, structured: bool = False) -> Prompt:
+    """
+    Render the compact prompt for a (canonicalized) profile within the token budgets.
+    """
+    fields: Dict[str, str] = {
+        "education": str(profile.get("education", "")),
+        "experience": condense(profile.get("experience")),
+        "tech_knowledge": ", ".join(profile.get("tech_knowledge") or []),
+        "interests": condense(profile.get("interests")),
+        "goal": str(profile.get("goal", "")),
+        "companies": condense(profile.get("companies")),
+        "learning_style": str(profile.get("learning_style", "")),
+        "time_commitment": str(profile.get("time_commitment", "")),
+        "other_constraints": condense(profile.get("other_constraints")),
+    }
+    raw_tokens = sum(count_tokens(str(v)) for v in fields.values())
+    truncated = []
+    for name, budget in FIELD_BUDGETS.items():
+        if count_tokens(fields[name]) > budget:
+            fields[name] = truncate(fields[name], budget)
+            truncated.append(name)
+    fmt = JSON_FORMAT_INSTRUCTIONS if structured else TEXT_FORMAT_INSTRUCTIONS
+    text = _TEMPLATE.format(format=fmt, **fields)
+    # Over the total budget: shrink the longest free-text fields until it fits
+    while count_tokens(text) > TOTAL_BUDGET:
+        name = max(FIELD_BUDGETS, key=lambda f: len(fields[f]))
+        if len(fields[name]) <= 16:
+            break
+        fields[name] = truncate(fields[name], max(count_tokens(fields[name]) // 2, 4))
+        if name not in truncated:
+            truncated.append(name)
+        text = _TEMPLATE.format(format=fmt, **fields)
+    tokens = count_tokens(text)
+    return Prompt(text, tokens, truncated, LEGACY_TEMPLATE_TOKENS + raw_tokens - tokens)
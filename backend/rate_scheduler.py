@@ -0,0 +1,355 @@
+"""
+Client-side rate scheduler for Groq calls.
+
+Keeps upstream traffic inside the account's requests-per-minute and
+tokens-per-minute budgets instead of finding them through 429s. Every call
+reserves one request and its estimated tokens from two token buckets;
+calls that cannot run yet wait in priority order, so interactive users go
+ahead of batch jobs. Rate-limit response headers resync the buckets, a 429
+pauses all traffic for its retry-after, and the number of concurrent calls
+adapts AIMD-style: halved on a 429, grown back by successes.
+
+Sync (Streamlit threads) and async (FastAPI) callers share one scheduler.
+
+The budgets are opt-in (GROQ_RPM / GROQ_TPM, 0 = unlimited) and per
+process: with N uvicorn workers or Streamlit servers, give each 1/N of the
+account's limits. Without them, only the limits Groq reports in its
+response headers (and 429s) slow callers down.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional
+
+from concurrency import Overloaded
+from metrics import STAGE_SECONDS, counter
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Waiters re-check at least this often, so a shortened wait is never overslept by much
+_MAX_POLL = 1.0
+
+RATE_LIMITED = counter("llm_rate_limited_total", "429 responses from Groq.")
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse Groq's reset durations ('7.66s', '2m59.56s', '450ms') or plain seconds.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _UNITS[unit] for n, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+class _Bucket:
+    """Continuously refilling per-minute budget; capacity <= 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def cost(self, amount: float) -> float:
+        # A single call larger than the whole budget still runs, on a full bucket
+        return min(amount, self.capacity)
+
+    def wait_time(self, amount: float) -> float:
+        if self.capacity <= 0 or self.level >= self.cost(amount):
+            return 0.0
+        return (self.cost(amount) - self.level) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.level -= self.cost(amount)
+
+    def give(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Ticket:
+    """One reservation: queued until granted, then held until released."""
+
+    __slots__ = ("tokens", "priority", "granted", "cancelled", "wake")
+
+    def __init__(self, tokens: int, priority: int, wake: Callable[[], None]):
+        self.tokens = tokens
+        self.priority = priority
+        self.granted = False
+        self.cancelled = False
+        self.wake = wake
+
+
+class RateScheduler:
+    """
+    Token-bucket admission for upstream calls with priority classes and
+    adaptive concurrency. acquire() / acquire_async() return a Ticket that
+    must be passed to release() once the call has finished.
+    """
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_concurrency: int = 32,
+        max_wait: Optional[float] = 60.0,
+    ):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {"granted": 0, "rate_limited": 0, "timed_out": 0}
+
+    # --- admission ---
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """
+        Grant queued tickets in priority order while budgets allow. Returns how
+        long the head of the queue has to wait, or None if it waits on a release.
+        Caller holds the lock.
+        """
+        while self._queue:
+            ticket = self._queue[0][2]
+            if ticket.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= int(self.limit):
+                return None
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(ticket.tokens))
+            if wait > 0:
+                return wait
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            self.in_flight += 1
+            self._counts["granted"] += 1
+            ticket.granted = True
+            ticket.wake()
+        return None
+
+    def _enqueue(self, tokens: int, priority: str, wake: Callable[[], None]) -> Ticket:
+        ticket = Ticket(tokens, PRIORITIES[priority], wake)
+        with self._lock:
+            heapq.heappush(self._queue, (ticket.priority, next(self._seq), ticket))
+        return ticket
+
+    def _poll(self, ticket: Ticket, deadline: Optional[float]) -> Optional[float]:
+        """Re-run dispatch and return how long to sleep before the next check."""
+        now = time.monotonic()
+        with self._lock:
+            hint = self._dispatch(now)
+            if ticket.granted:
+                return 0.0
+            if deadline is not None and now >= deadline:
+                ticket.cancelled = True
+                self._counts["timed_out"] += 1
+                raise Overloaded(max(1, math.ceil(hint or 1)))
+        return min(hint or _MAX_POLL, _MAX_POLL)
+
+    def _abandon(self, ticket: Ticket) -> None:
+        with self._lock:
+            if not ticket.granted:
+                ticket.cancelled = True
+                return
+        # Granted while we were giving up: hand the reservation back
+        self.release(ticket, used_tokens=0)
+
+    def acquire(self, tokens: int, priority: str = "interactive") -> Ticket:
+        """
+        Blocks until the call may run. Raises Overloaded after max_wait seconds.
+        """
+        event = threading.Event()
+        ticket = self._enqueue(tokens, priority, event.set)
+        started = time.monotonic()
+        deadline = started + self.max_wait if self.max_wait else None
+        try:
+            while True:
+                timeout = self._poll(ticket, deadline)
+                if ticket.granted:
+                    break
+                event.wait(timeout)
+                event.clear()
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        STAGE_SECONDS.observe(time.monotonic() - started, stage="schedule")
+        return ticket
+
+    async def acquire_async(self, tokens: int, priority: str = "interactive") -> Ticket:
+        """
+        Async variant of acquire(); waiting does not block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        ticket = self._enqueue(tokens, priority, lambda: loop.call_soon_threadsafe(event.set))
+        started = time.monotonic()
+        deadline = started + self.max_wait if self.max_wait else None
+        try:
+            while True:
+                timeout = self._poll(ticket, deadline)
+                if ticket.granted:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        STAGE_SECONDS.observe(time.monotonic() - started, stage="schedule")
+        return ticket
+
+    def release(self, ticket: Ticket, used_tokens: Optional[int] = None) -> None:
+        """
+        Frees the concurrency slot. With the actual token usage, the difference
+        from the estimate is refunded to (or charged against) the token bucket.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if used_tokens is not None:
+                self.tokens.give(self.tokens.cost(ticket.tokens) - used_tokens)
+            self._dispatch(time.monotonic())
+
+    def has_headroom(self) -> bool:
+        """True when nothing is queued and a call could start right now."""
+        with self._lock:
+            return not any(not t.cancelled for _, _, t in self._queue) and self.in_flight < int(self.limit)
+
+    # --- feedback from Groq ---
+
+    def succeeded(self) -> None:
+        """Additive increase: about one more concurrent call per window of successes."""
+        with self._lock:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._dispatch(time.monotonic())
+
+    def rate_limited(self, headers: Mapping[str, str]) -> float:
+        """
+        Handle a 429: pause everyone for retry-after and halve concurrency.
+        Returns the pause in seconds.
+        """
+        RATE_LIMITED.inc()
+        pause = retry_after_seconds(headers)
+        if pause is None:
+            pause = parse_duration(headers.get("x-ratelimit-reset-tokens")) or 1.0
+        with self._lock:
+            self._counts["rate_limited"] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.limit = max(1.0, self.limit / 2)
+        self.observe(headers)
+        return pause
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """
+        Resync the buckets with Groq's x-ratelimit-* headers.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            # Groq's request headers count per day: they can only use up a configured budget
+            remaining = _number(headers.get("x-ratelimit-remaining-requests"))
+            if remaining is not None and self.requests.capacity > 0:
+                self.requests.level = min(self.requests.level, remaining)
+            # The token headers are per minute. Never raise a configured budget; an
+            # unlimited bucket adopts Groq's limit, starting from what is left of it
+            limit = _number(headers.get("x-ratelimit-limit-tokens"))
+            if limit and (self.tokens.capacity <= 0 or limit < self.tokens.capacity):
+                adopted = self.tokens.capacity <= 0
+                self.tokens.capacity = limit
+                self.tokens.level = limit if adopted else min(self.tokens.level, limit)
+            remaining = _number(headers.get("x-ratelimit-remaining-tokens"))
+            if remaining is not None and self.tokens.capacity > 0:
+                self.tokens.level = min(self.tokens.level, remaining)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            queued = {name: 0 for name in PRIORITIES}
+            names = {v: k for k, v in PRIORITIES.items()}
+            for priority, _, ticket in self._queue:
+                if not ticket.cancelled:
+                    queued[names[priority]] += 1
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                **self._counts,
+                "in_flight": self.in_flight,
+                "concurrency_limit": int(self.limit),
+                "queued": queued,
+                "requests_available": round(self.requests.level, 1) if self.requests.capacity > 0 else None,
+                "tokens_available": round(self.tokens.level) if self.tokens.capacity > 0 else None,
+                "paused_for": round(max(0.0, self.paused_until - now), 2),
+            }
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_scheduler: Optional[RateScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateScheduler:
+    """
+    Returns the process-wide scheduler, configured from GROQ_RPM / GROQ_TPM
+    (this process's share of the account budget; 0, the default, disables
+    a budget), GROQ_MAX_CONCURRENCY and GROQ_SCHEDULER_MAX_WAIT.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                max_wait = float(os.getenv("GROQ_SCHEDULER_MAX_WAIT", "60"))
+                _scheduler = RateScheduler(
+                    rpm=float(os.getenv("GROQ_RPM", "0")),
+                    tpm=float(os.getenv("GROQ_TPM", "0")),
+                    max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "32")),
+                    max_wait=max_wait if max_wait > 0 else None,
+                )
+    return _scheduler
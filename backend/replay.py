@@ -0,0 +1,170 @@
+"""
+Replay captured traffic (see capture.py).
+
+Usage:
+    python replay.py captures/ --url http://localhost:8000             # original timing
+    python replay.py captures/ --url http://localhost:8000 --speed 4   # 4x faster
+    python replay.py captures/ --url http://localhost:8000 --speed 0 -c 64
+    python replay.py captures/ --warm                                  # fill the local caches
+    python replay.py captures/ --warm --url http://localhost:8000      # warm a deployment
+
+Requests are sent to POST /recommend at the captured inter-arrival times
+divided by --speed (0 sends as fast as --concurrency allows) and a latency
+summary is printed as JSON. --warm sends each distinct profile once with no
+pacing: against --url that warms the target's caches, without it the
+reports are generated in this process at batch priority into the shared
+response cache. Only captures taken with TRAFFIC_CAPTURE_ANONYMIZE=0 warm
+real users' entries; anonymized ones still warm every blank-free-text cohort.
+"""
+
+import argparse
+import asyncio
+import functools
+import glob
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from batch import run_batch
+
+Recommender = Callable[[dict], Awaitable[dict]]
+
+
+def capture_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, "capture-*.jsonl.gz"))
+        else:
+            files.append(path)
+    return sorted(files, key=os.path.getmtime)
+
+
+def read_events(files: List[str], source: Optional[str] = None) -> Iterator[dict]:
+    for path in files:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        event = json.loads(line)
+                        if source is None or event.get("source") == source:
+                            yield event
+            except EOFError:
+                # The file of a running process ends mid-stream after its last flush
+                pass
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {f"p{q}": round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * 1000, 1) for q in (50, 90, 95, 99)}
+
+
+async def replay(events: List[dict], recommend: Recommender, speed: float, concurrency: int) -> Dict[str, object]:
+    """
+    Re-drive events at their captured offsets / speed with at most
+    `concurrency` requests in flight.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    outcomes: Dict[str, int] = {}
+    first_ts = events[0]["ts"] if events else 0.0
+    started = time.perf_counter()
+
+    async def one(event: dict) -> None:
+        sent = time.perf_counter()
+        try:
+            result = await recommend(event["user_data"])
+            report = result.get("report", "")
+            outcome = "error" if report.startswith("Error") else "degraded" if result.get("degraded") else "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        finally:
+            semaphore.release()
+        latencies.append(time.perf_counter() - sent)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    # Tasks are created as events fall due, so memory does not grow with the capture
+    pending = set()
+    for event in events:
+        if speed > 0:
+            await asyncio.sleep(max(0.0, (event["ts"] - first_ts) / speed - (time.perf_counter() - started)))
+        await semaphore.acquire()
+        task = asyncio.create_task(one(event))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(events),
+        "outcomes": outcomes,
+        "seconds": round(elapsed, 2),
+        "rps": round(len(events) / elapsed, 2) if elapsed else None,
+        "latency_ms": _percentiles(latencies),
+    }
+
+
+async def warm(events: List[dict], recommend: Recommender, concurrency: int) -> Dict[str, object]:
+    """Send each distinct profile once, as fast as `concurrency` allows."""
+    unique = {json.dumps(event["user_data"], sort_keys=True, ensure_ascii=False) for event in events}
+
+    async def lines():
+        for line in unique:
+            yield line
+
+    outcomes: Dict[str, int] = {}
+    async for result in run_batch(lines(), recommend, concurrency):
+        report = result.get("report", "")
+        outcome = "error" if "error" in result or report.startswith("Error") else "ok"
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {"events": len(events), "profiles": len(unique), "outcomes": outcomes}
+
+
+def remote_recommender(client) -> Recommender:
+    async def recommend(user_data: dict) -> dict:
+        response = await client.post("/recommend", json=user_data)
+        response.raise_for_status()
+        return response.json()
+    return recommend
+
+
+async def run(args) -> Dict[str, object]:
+    events = sorted(read_events(capture_files(args.paths), args.source), key=lambda e: e["ts"])
+    if args.limit:
+        events = events[:args.limit]
+    if args.url:
+        import httpx
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=httpx.Timeout(10.0, read=None), limits=limits) as client:
+            recommend = remote_recommender(client)
+            if args.warm:
+                return await warm(events, recommend, args.concurrency)
+            return await replay(events, recommend, args.speed, args.concurrency)
+    if not args.warm:
+        sys.exit("--url is required unless --warm is given")
+    from llm_utils import get_llm_recommendation_async
+
+    return await warm(events, functools.partial(get_llm_recommendation_async, priority="batch"), args.concurrency)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured /recommend traffic or pre-warm caches from it.")
+    parser.add_argument("paths", nargs="+", help="capture directories or .jsonl(.gz) files")
+    parser.add_argument("--url", help="target backend base URL")
+    parser.add_argument("--speed", type=float, default=1.0, help="timing scale: 1 = original, 2 = twice as fast, 0 = no pacing")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="requests in flight at most")
+    parser.add_argument("--source", choices=("api", "app"), help="only replay events captured by this source")
+    parser.add_argument("--limit", type=int, help="replay only the first N events")
+    parser.add_argument("--warm", action="store_true", help="send each distinct profile once to fill caches")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Typed report object for the structured (JSON) response mode.
+
+The model is asked for a compact JSON object which is validated in one pass.
+If that fails, the reply goes through the plain-text section parser instead.
+Counters record how often each path is taken, and how often users retry.
+"""
+
+import json
+import threading
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from sections import REQUIRED_SECTIONS, missing_sections, parse_sections
+
+JSON_FORMAT_INSTRUCTIONS = """Reply with only this JSON object:
+{"salary_range":"<range>","roles":["<title>"],"missing_skills":["<skill>"],"learning_tracks":["<our course>","<other>"],"roi":"<roi>"}"""
+
+
+class CareerReport(BaseModel):
+    """The five report sections."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    salary_range: str = Field(min_length=1, alias="Estimated Salary Range")
+    roles: List[str] = Field(min_length=1, alias="Roles They Can Aim For")
+    missing_skills: List[str] = Field(min_length=1, alias="Skills They're Missing")
+    learning_tracks: List[str] = Field(min_length=1, alias="Suggested Learning Tracks")
+    roi: str = Field(min_length=1, alias="ROI of Upskilling")
+
+    @field_validator("roles", "missing_skills", "learning_tracks", mode="before")
+    @classmethod
+    def _split_lines(cls, value):
+        # Models sometimes return a newline-separated string instead of a list
+        if isinstance(value, str):
+            return [line.strip() for line in value.splitlines() if line.strip()]
+        return value
+
+    def to_sections(self) -> Dict[str, str]:
+        tracks = [
+            track if track[:1].isdigit() else f"{i}. {track}"
+            for i, track in enumerate(self.learning_tracks, 1)
+        ]
+        return {
+            "Estimated Salary Range": self.salary_range,
+            "Roles They Can Aim For": "\n".join(self.roles),
+            "Skills They're Missing": "\n".join(self.missing_skills),
+            "Suggested Learning Tracks": "\n".join(tracks),
+            "ROI of Upskilling": self.roi,
+        }
+
+    def to_text(self) -> str:
+        """Render in the plain-text report format, so text consumers keep working."""
+        sections = self.to_sections()
+        body = "\n\n".join(f"{key}:\n{sections[key]}" for key in REQUIRED_SECTIONS)
+        return f"---\n{body}\n---"
+
+
+class ReportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"json_ok": 0, "json_fallback": 0, "text_ok": 0, "incomplete": 0, "retries": 0}
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+report_stats = ReportStats()
+
+
+def parse_structured(content: str) -> Optional[CareerReport]:
+    try:
+        return CareerReport.model_validate_json(content)
+    except ValidationError:
+        return None
+
+
+def _salvage_json(content: str) -> str:
+    # Keep whatever sections a schema-invalid JSON reply does contain
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(data, dict):
+        return content
+    lines = ["---"]
+    for name, field in CareerReport.model_fields.items():
+        value = data.get(name, data.get(field.alias))
+        if isinstance(value, list):
+            value = "\n".join(str(v) for v in value)
+        if value:
+            lines += [f"{field.alias}:", str(value), ""]
+    lines.append("---")
+    return "\n".join(lines)
+
+
+def finalize_reply(content: str, structured: bool) -> dict:
+    """
+    Turn a raw model reply into the result dict.
+    Structured replies are validated into a CareerReport and rendered as text;
+    anything else falls back to the text section parser.
+    """
+    if structured:
+        report = parse_structured(content)
+        if report is not None:
+            report_stats.incr("json_ok")
+            return {"report": report.to_text(), "structured": report.model_dump()}
+        report_stats.incr("json_fallback")
+        content = _salvage_json(content)
+    if missing_sections(parse_sections(content)):
+        report_stats.incr("incomplete")
+    else:
+        report_stats.incr("text_ok")
+    return {"report": content}
@@ -0,0 +1,138 @@
+"""
+Persistent LLM response cache backed by SQLite in WAL mode.
+
+Entries are keyed by the prompt/model/params hash, so app.py, every uvicorn
+worker and every redeploy on the same host share one warm cache. SQLite's
+locking makes it safe for multiple processes; WAL keeps readers from
+blocking on writers. Entries expire after a TTL and the least recently
+used ones are evicted past a maximum entry count.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3")
+
+# Refresh an entry's LRU timestamp at most this often, so hits stay read-only
+_TOUCH_INTERVAL = 60.0
+# Run eviction once every this many writes
+_EVICT_EVERY = 64
+
+
+class ResponseStore:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = 7 * 24 * 3600, max_entries: int = 100_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            row = self._conn().execute(
+                "SELECT value, created_at, accessed_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            self.misses += 1
+            return None
+        if row is None or row[1] < now - self.ttl:
+            self.misses += 1
+            return None
+        if row[2] < now - _TOUCH_INTERVAL:
+            try:
+                self._conn().execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                pass
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+        except sqlite3.Error:
+            # The cache is an optimisation; never fail a request because of it
+            return
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Drops expired entries, then the least recently used ones above max_entries.
+        """
+        conn = self._conn()
+        try:
+            removed = conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        except sqlite3.Error:
+            return 0
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        try:
+            size = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            size = -1
+        return {"size": size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_store: Optional[ResponseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_response_store() -> Optional[ResponseStore]:
+    """
+    Returns the process-wide store, or None if LLM_CACHE_PATH is set to 'off'.
+    """
+    global _store
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_PATH)
+    if path.lower() in ("", "off", "none", "0"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResponseStore(
+                    path,
+                    ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")),
+                )
+    return _store
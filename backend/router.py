@@ -0,0 +1,232 @@
+"""
+Model routing and hedged requests.
+
+LLM_MODELS lists the models to use, primary first, and LLM_MODEL_PARAMS
+(a JSON object keyed by model) overrides sampling params per model.
+Interactive calls start on the primary. If it has not answered (or, when
+streaming, produced a first token) within its observed p90 latency, a hedge
+goes to the next model, or to another replica of the same model when only
+one is configured. The first valid result wins and the other call is
+cancelled, so the tail follows the faster of two draws instead of the
+slowest replica. A primary that fails sooner is hedged only when the
+caller's failover() accepts its error (e.g. 5xx or an open circuit); other
+failures, such as a 400, are returned as they are.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from concurrent import futures
+from typing import Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+
+from metrics import counter, histogram
+
+T = TypeVar("T")
+
+DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+HEDGE_ENABLED = os.getenv("HEDGE_REQUESTS", "1").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.9"))
+# Used until a model has HEDGE_MIN_SAMPLES observations
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DELAY", "2.0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+MODEL_SECONDS = histogram("llm_model_seconds", "Upstream latency by model and kind (ttft, completion).")
+HEDGES = counter("llm_hedges_total", "Hedge requests by outcome (sent, won).")
+
+
+class Route(NamedTuple):
+    model: str
+    params: Dict[str, Any]
+
+
+def routes_from_env() -> List[Route]:
+    models = [m.strip() for m in os.getenv("LLM_MODELS", DEFAULT_MODEL).split(",") if m.strip()]
+    overrides = json.loads(os.getenv("LLM_MODEL_PARAMS") or "{}")
+    return [Route(model, overrides.get(model, {})) for model in models]
+
+
+ROUTES = routes_from_env()
+PRIMARY = ROUTES[0]
+# With a single model the hedge is a second request to it, usually served by another replica
+HEDGE = ROUTES[1] if len(ROUTES) > 1 else ROUTES[0]
+
+
+class LatencyStats:
+    """
+    Sliding window of recent latencies per (model, kind).
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, kind: str, seconds: float) -> None:
+        MODEL_SECONDS.observe(seconds, model=model, kind=kind)
+        with self._lock:
+            samples = self._samples.get((model, kind))
+            if samples is None:
+                samples = self._samples[(model, kind)] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, model: str, kind: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get((model, kind), ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        with self._lock:
+            keys = list(self._samples)
+        stats: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        for model, kind in keys:
+            stats.setdefault(model, {})[kind] = {
+                "count": len(self._samples[(model, kind)]),
+                **{f"p{int(q * 100)}": self.quantile(model, kind, q) for q in (0.5, 0.9, 0.99)},
+            }
+        return stats
+
+
+latency_stats = LatencyStats()
+
+
+def hedge_delay(kind: str) -> float:
+    """How long the primary gets before a hedge is sent."""
+    observed = latency_stats.quantile(PRIMARY.model, kind, HEDGE_QUANTILE)
+    return max(HEDGE_MIN_DELAY, observed if observed is not None else HEDGE_DEFAULT_DELAY)
+
+
+def _discard_finished(outcome, discard: Callable[[T], None]) -> None:
+    # Clean up a call that finished after another one already won
+    if outcome.cancelled() or outcome.exception() is not None:
+        return
+    discard(outcome.result())
+
+
+def _fails_over(outcome, failover: Callable[[BaseException], bool]) -> bool:
+    # Only an error may be worth another model's time; a rejected result is final
+    error = None if outcome.cancelled() else outcome.exception()
+    return error is not None and failover(error)
+
+
+async def hedged(
+    start: Callable[[Route], Awaitable[T]],
+    accept: Callable[[T], bool],
+    kind: str,
+    discard: Callable[[T], None] = lambda result: None,
+    can_hedge: Callable[[], bool] = lambda: True,
+    failover: Callable[[BaseException], bool] = lambda error: True,
+) -> T:
+    """
+    Run start(PRIMARY) and, if it has not produced an accepted result within
+    hedge_delay(kind), start(HEDGE) alongside it. Returns the first accepted
+    result, or the last one if none is accepted; other calls are cancelled
+    and any result they still produce is passed to discard().
+    No hedge is sent while can_hedge() is false, e.g. when calls are queueing.
+    A primary that finishes first without an accepted result is hedged only
+    if it raised an error failover() accepts; otherwise its outcome is final.
+    """
+    tasks = {asyncio.create_task(start(PRIMARY))}
+    timeout: Optional[float] = hedge_delay(kind) if HEDGE_ENABLED else None
+    hedge = last = None
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None and accept(task.result()):
+                    if task is hedge:
+                        HEDGES.inc(outcome="won")
+                    return task.result()
+                if last is not None:
+                    _discard_finished(last, discard)
+                last = task
+            if timeout is not None:
+                timeout = None
+                if not tasks and not _fails_over(last, failover):
+                    return last.result()
+                # Primary is slow or failed over: send the hedge and wait for whichever is first
+                if can_hedge() or not tasks:
+                    HEDGES.inc(outcome="sent")
+                    hedge = asyncio.create_task(start(HEDGE))
+                    tasks.add(hedge)
+        return last.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+            task.add_done_callback(lambda t: _discard_finished(t, discard))
+
+
+_pool: Optional[futures.ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> futures.ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = futures.ThreadPoolExecutor(
+                    max_workers=int(os.getenv("HEDGE_THREADS", "32")), thread_name_prefix="hedge",
+                )
+    return _pool
+
+
+def hedged_sync(
+    start: Callable[[Route], T],
+    accept: Callable[[T], bool],
+    kind: str,
+    discard: Callable[[T], None] = lambda result: None,
+    can_hedge: Callable[[], bool] = lambda: True,
+    failover: Callable[[BaseException], bool] = lambda error: True,
+) -> T:
+    """
+    Thread-based variant of hedged() for the blocking code paths. A running
+    loser cannot be interrupted, so its result is discarded when it finishes.
+    """
+    if not HEDGE_ENABLED:
+        return start(PRIMARY)
+    pool = _get_pool()
+    calls = {pool.submit(start, PRIMARY)}
+    timeout: Optional[float] = hedge_delay(kind)
+    hedge = last = None
+    try:
+        while calls:
+            done, _ = futures.wait(calls, timeout=timeout, return_when=futures.FIRST_COMPLETED)
+            for call in done:
+                calls.discard(call)
+                if call.exception() is None and accept(call.result()):
+                    if call is hedge:
+                        HEDGES.inc(outcome="won")
+                    return call.result()
+                if last is not None:
+                    _discard_finished(last, discard)
+                last = call
+            if timeout is not None:
+                timeout = None
+                if not calls and not _fails_over(last, failover):
+                    return last.result()
+                if can_hedge() or not calls:
+                    HEDGES.inc(outcome="sent")
+                    hedge = pool.submit(start, HEDGE)
+                    calls.add(hedge)
+        return last.result()
+    finally:
+        for call in calls:
+            call.cancel()
+            call.add_done_callback(lambda c: _discard_finished(c, discard))
+
+
+def routing_stats() -> Dict[str, Any]:
+    return {
+        "models": [route.model for route in ROUTES],
+        "hedge_model": HEDGE.model if HEDGE_ENABLED else None,
+        "hedge_delay": {kind: round(hedge_delay(kind), 3) for kind in ("ttft", "completion")},
+        "latency": latency_stats.snapshot(),
+    }
@@ -0,0 +1,551 @@
+"""
+Columnar salary/role analytics over generated reports.
+
+Every fresh, complete LLM report is parsed into one row: the profile's
+education, goal, learning style, hours and known languages, the salary
+range in LPA and up to MAX_ROLES role titles. Rows are appended to one raw
+little-endian file per column under SALARY_INDEX_PATH and read back as
+memory-mapped NumPy arrays shared through the page cache by every process.
+Filters are vectorized scans; group-bys and percentiles are read off
+per-group salary histograms built with np.bincount, so no query sorts.
+
+    ts              uint32   seconds since the epoch
+    education       uint8    code into categories["education"]
+    goal            uint8    code into categories["goal"]
+    learning_style  uint8    code into categories["learning_style"]
+    hours           uint8    time commitment per week
+    skills          uint32   bit i set: knows categories["skills"][i]
+    salary_low      uint16   tenths of a lakh (LPA * SALARY_SCALE)
+    salary_high     uint16   tenths of a lakh
+    roles           3xuint16 codes into categories["roles"], NO_ROLE padded
+
+The categories live in meta.json. Education, goal and style are seeded
+from the form options; values outside them are stored as "Other" (or "No
+preference"). Role titles are free text and get new codes as they appear.
+
+record() only queues; a background thread parses batches and appends them
+holding an exclusive lock on the directory, so API workers and Streamlit
+processes can share one index. A row is visible once every
+column holds it; a torn append is cut back by the next writer.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from form_options import CAREER_GOALS, EDUCATION_LEVELS, LEARNING_STYLES, OTHER_LANGUAGES, POPULAR_LANGUAGES
+from metrics import counter
+from sections import parse_sections
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "salaries")
+
+MAX_ROLES = 3
+NO_ROLE = np.iinfo(np.uint16).max
+
+# Salaries are stored in tenths of a lakh; percentiles are exact to that step.
+# Histograms stop at SALARY_BINS (200 LPA), higher values count in the top bin.
+SALARY_SCALE = 10
+SALARY_BINS = 2000
+
+COLUMNS = {
+    "ts": np.dtype("<u4"),
+    "education": np.dtype("u1"),
+    "goal": np.dtype("u1"),
+    "learning_style": np.dtype("u1"),
+    "hours": np.dtype("u1"),
+    "skills": np.dtype("<u4"),
+    "salary_low": np.dtype("<u2"),
+    "salary_high": np.dtype("<u2"),
+    "roles": np.dtype(("<u2", (MAX_ROLES,))),
+}
+
+# Single-valued categorical columns and the option unknown values fall into
+CATEGORICAL = {"education": "Other", "goal": "Other", "learning_style": "No preference"}
+GROUP_BY = ("goal", "education", "learning_style", "skill", "role")
+
+# Re-stat the column files at most this often to pick up appended rows
+_RELOAD_INTERVAL = 5.0
+
+ROWS = counter("salary_index_rows_total", "Reports fed to the salary index by outcome (written, unparsed, dropped).")
+
+_NUMBER = re.compile(r"\d+(?:,\d+)*(?:\.\d+)?")
+_CRORE = re.compile(r"\b(?:crores?|cr)\b")
+_LAKH = re.compile(r"\b(?:lpa|lakhs?|lacs?|l)\b")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+_STOP = object()
+
+
+def parse_salary_range(text: str) -> Optional[Tuple[float, float]]:
+    """
+    (low, high) in LPA from a report's salary range, e.g. '₹6–10 LPA',
+    '₹4.5 - 9 lakh', '₹6,00,000 - ₹10,00,000 per annum' or '₹1.2 Cr'.
+    The first two figures are the current range. None if there is none.
+    """
+    text = str(text or "").lower()
+    numbers = [float(n.replace(",", "")) for n in _NUMBER.findall(text)[:2]]
+    if not numbers:
+        return None
+    if _CRORE.search(text):
+        scale = 100.0
+    elif _LAKH.search(text) or max(numbers) < 1000:
+        scale = 1.0
+    else:
+        # Plain rupees, as format_inr writes them
+        scale = 1e-5
+    low, high = sorted(n * scale for n in (numbers + numbers)[:2])
+    if not 0 < low <= high < 10_000:
+        return None
+    return low, high
+
+
+def report_fields(result: Dict[str, Any]) -> Optional[Tuple[float, float, List[str]]]:
+    """(salary low, salary high, role titles) of a result, or None if unparseable."""
+    structured = result.get("structured") or {}
+    salary, roles = structured.get("salary_range"), structured.get("roles")
+    if salary is None or roles is None:
+        sections = parse_sections(result.get("report", ""))
+        salary = sections.get("Estimated Salary Range", "") if salary is None else salary
+        roles = sections.get("Roles They Can Aim For", "").splitlines() if roles is None else roles
+    parsed = parse_salary_range(salary)
+    if parsed is None:
+        return None
+    titles = []
+    for role in roles:
+        title = " ".join(_LIST_MARKER.sub("", str(role)).split()).rstrip(".")
+        if title:
+            titles.append(title)
+    return parsed[0], parsed[1], titles
+
+
+def _default_categories() -> Dict[str, List[str]]:
+    return {
+        "education": list(EDUCATION_LEVELS),
+        "goal": list(CAREER_GOALS),
+        "learning_style": list(LEARNING_STYLES),
+        "skills": POPULAR_LANGUAGES + OTHER_LANGUAGES,
+        "roles": [],
+    }
+
+
+def _lookup(options: Sequence[str], value) -> Optional[int]:
+    value = str(value or "").strip().lower()
+    for code, option in enumerate(options):
+        if option.lower() == value:
+            return code
+    return None
+
+
+class Snapshot(NamedTuple):
+    rows: int
+    columns: Dict[str, np.ndarray]
+    categories: Dict[str, List[str]]
+
+
+class SalaryIndex:
+    def __init__(self, directory: str, queue_size: int = 10_000, batch_size: int = 512, flush_interval: float = 1.0):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._checked = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # --- ingestion ---
+
+    def record(self, user_data: dict, result: Dict[str, Any]) -> None:
+        """Queue a finished report for the writer thread; never blocks."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="salary-index", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        try:
+            self._queue.put_nowait((time.time(), dict(user_data), result))
+        except queue.Full:
+            self.dropped += 1
+            ROWS.inc(outcome="dropped")
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            try:
+                self.append(batch)
+            except Exception:
+                logger.exception("appending to the salary index failed")
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=1)
+            except queue.Full:
+                return
+            self._thread.join(timeout=5)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._path(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _load_categories(self) -> Dict[str, List[str]]:
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                categories = json.load(f)["categories"]
+        except (OSError, ValueError, KeyError):
+            return _default_categories()
+        # Options added to the form since the index was created get new codes
+        for name, options in _default_categories().items():
+            known = {option.lower() for option in categories.setdefault(name, [])}
+            categories[name] += [option for option in options if option.lower() not in known]
+        return categories
+
+    def _save_categories(self, categories: Dict[str, List[str]]) -> None:
+        tmp = self._path(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "categories": categories}, f, ensure_ascii=False)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _encode(self, categories: Dict[str, List[str]], ts: float, user_data: dict, result: Dict[str, Any]) -> Optional[tuple]:
+        fields = report_fields(result)
+        if fields is None:
+            return None
+        low, high, titles = fields
+        codes = []
+        for name, fallback in CATEGORICAL.items():
+            code = _lookup(categories[name], user_data.get(name))
+            codes.append(code if code is not None else _lookup(categories[name], fallback))
+        skills = 0
+        for skill in user_data.get("tech_knowledge") or []:
+            bit = _lookup(categories["skills"], skill)
+            if bit is not None and bit < 32:
+                skills |= 1 << bit
+        roles = []
+        for title in titles[:MAX_ROLES]:
+            code = _lookup(categories["roles"], title)
+            if code is None and len(categories["roles"]) < NO_ROLE:
+                code = len(categories["roles"])
+                categories["roles"].append(title)
+            if code is not None:
+                roles.append(code)
+        roles += [NO_ROLE] * (MAX_ROLES - len(roles))
+        try:
+            hours = min(max(int(user_data.get("time_commitment") or 0), 0), 255)
+        except (TypeError, ValueError):
+            hours = 0
+        low, high = (min(int(round(value * SALARY_SCALE)), SALARY_BINS - 1) for value in (low, high))
+        return (int(ts), *codes, hours, skills, low, high, roles)
+
+    def _stored_rows(self) -> int:
+        sizes = []
+        for name, dtype in COLUMNS.items():
+            try:
+                sizes.append(os.path.getsize(self._path(f"{name}.col")) // dtype.itemsize)
+            except OSError:
+                sizes.append(0)
+        return min(sizes)
+
+    def append(self, items: Sequence[Tuple[float, dict, Dict[str, Any]]]) -> int:
+        """
+        Parses (timestamp, user_data, result) items and appends the rows.
+        Safe to call from several processes. Returns the rows written.
+        """
+        with self._locked():
+            categories = self._load_categories()
+            roles_before = len(categories["roles"])
+            rows = [row for row in (self._encode(categories, *item) for item in items) if row is not None]
+            if len(rows) < len(items):
+                ROWS.inc(len(items) - len(rows), outcome="unparsed")
+            if not rows:
+                return 0
+            if len(categories["roles"]) != roles_before or not os.path.exists(self._path("meta.json")):
+                self._save_categories(categories)
+            stored = self._stored_rows()
+            for (name, dtype), values in zip(COLUMNS.items(), zip(*rows)):
+                with open(self._path(f"{name}.col"), "ab") as f:
+                    # Cut back what an interrupted append left beyond the last whole row
+                    f.truncate(stored * dtype.itemsize)
+                    f.write(np.array(values, dtype=dtype.base).tobytes())
+        self.written += len(rows)
+        ROWS.inc(len(rows), outcome="written")
+        return len(rows)
+
+    # --- queries ---
+
+    def snapshot(self) -> Snapshot:
+        """The memory-mapped columns, re-mapped when rows have been appended."""
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked >= _RELOAD_INTERVAL:
+                self._reload()
+            return self._snapshot
+
+    def _reload(self) -> None:
+        self._checked = time.monotonic()
+        rows = self._stored_rows()
+        if self._snapshot is not None and rows == self._snapshot.rows:
+            return
+        columns = {
+            name: np.memmap(self._path(f"{name}.col"), dtype=dtype, mode="r", shape=(rows,)) if rows else np.empty(0, dtype)
+            for name, dtype in COLUMNS.items()
+        }
+        self._snapshot = Snapshot(rows, columns, self._load_categories())
+
+    def _mask(
+        self,
+        snap: Snapshot,
+        goal: Optional[str] = None,
+        education: Optional[str] = None,
+        learning_style: Optional[str] = None,
+        skills: Sequence[str] = (),
+        since: Optional[float] = None,
+    ) -> Optional[np.ndarray]:
+        """Rows matching every given filter; None when there are no filters."""
+        conditions = []
+        for name, value in (("goal", goal), ("education", education), ("learning_style", learning_style)):
+            if value is not None:
+                code = _lookup(snap.categories[name], value)
+                conditions.append(snap.columns[name] == code if code is not None else np.zeros(snap.rows, dtype=bool))
+        if skills:
+            bits = [_lookup(snap.categories["skills"], skill) for skill in skills]
+            if any(bit is None or bit >= 32 for bit in bits):
+                conditions.append(np.zeros(snap.rows, dtype=bool))
+            else:
+                wanted = np.uint32(sum(1 << bit for bit in set(bits)))
+                conditions.append((snap.columns["skills"] & wanted) == wanted)
+        if since is not None:
+            conditions.append(snap.columns["ts"] >= since)
+        if not conditions:
+            return None
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask &= condition
+        return mask
+
+    def _grouped(
+        self, snap: Snapshot, mask: Optional[np.ndarray], group_by: Optional[str], top: int
+    ) -> Tuple[List[str], Tuple[np.ndarray, ...]]:
+        """
+        Names of the `top` largest groups of the matching rows and their salary
+        histograms (see _histograms). A row counts once in each group it
+        belongs to: its categorical value, every skill it lists, every role.
+        """
+        def selected(name: str) -> np.ndarray:
+            column = snap.columns[name]
+            return column if mask is None else column[mask]
+
+        low, high = selected("salary_low"), selected("salary_high")
+        if group_by is None:
+            return ["all"], _histograms(None, 1, low, high)
+        if group_by in CATEGORICAL:
+            # Few codes: histogram all of them and keep the top ones after
+            names = snap.categories[group_by]
+            histograms = _histograms(selected(group_by), len(names), low, high)
+            kept = _top_codes(histograms[0].sum(axis=1), top)
+            return [names[c] for c in kept], tuple(h[kept] for h in histograms)
+        elif group_by == "skill":
+            names = snap.categories["skills"][:32]
+            # Histograms by value of each byte of the bitmask (byte i holds bits
+            # 8i..8i+7, the column is little-endian), summed into one per bit
+            as_bytes = selected("skills").view(np.uint8).reshape(-1, 4)
+            histograms = [np.zeros((len(names), n)) for n in (SALARY_BINS, SALARY_BINS, 2 * SALARY_BINS)]
+            for i in range(min(4, -(-len(names) // 8))):
+                bits = min(8, len(names) - 8 * i)
+                for total, by_value in zip(histograms, _histograms(as_bytes[:, i], 256, low, high)):
+                    total[8 * i:8 * i + bits] = _BYTE_BITS[:bits] @ by_value
+            kept = _top_codes(histograms[0].sum(axis=1), top)
+            return [names[c] for c in kept], tuple(h[kept] for h in histograms)
+        elif group_by == "role":
+            names, slots = snap.categories["roles"], selected("roles")
+            counts = np.bincount(slots.ravel(), minlength=NO_ROLE + 1)[:len(names)]
+            kept, number = _keep(counts, top, NO_ROLE + 1)
+            histograms = _histograms(number[slots[:, 0]], len(kept) + 1, low, high)
+            for slot in range(1, MAX_ROLES):
+                for total, more in zip(histograms, _histograms(number[slots[:, slot]], len(kept) + 1, low, high)):
+                    total += more
+        else:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+        # The last group collects everything outside the top ones
+        return [names[c] for c in kept], tuple(h[:-1] for h in histograms)
+
+    def salary_stats(
+        self,
+        group_by: Optional[str] = None,
+        percentiles: Sequence[float] = (10, 25, 50, 75, 90),
+        top: int = 20,
+        **filters,
+    ) -> Dict[str, Any]:
+        """
+        Salary percentiles (low end, high end and midpoint of the ranges, in
+        LPA) of the rows matching the filters, overall or for the `top`
+        largest groups of goal, education, learning_style, skill or role.
+        """
+        snap = self.snapshot()
+        mask = self._mask(snap, **filters)
+        names, histograms = self._grouped(snap, mask, group_by, top)
+        return {
+            "rows": snap.rows,
+            "matched": snap.rows if mask is None else int(np.count_nonzero(mask)),
+            "groups": {name: _summary([h[i] for h in histograms], percentiles) for i, name in enumerate(names)},
+        }
+
+    def compare(self, user_data: dict, salary_range: str, min_peers: int = 20) -> Optional[Dict[str, Any]]:
+        """
+        Where a report's salary range falls among peers: reports for the same
+        goal and education, or the same goal alone when that cohort is too
+        small. None without a parseable range or min_peers peers.
+        """
+        parsed = parse_salary_range(salary_range)
+        if parsed is None:
+            return None
+        snap = self.snapshot()
+        cohort = {}
+        for name in ("goal", "education"):
+            code = _lookup(snap.categories[name], user_data.get(name))
+            cohort[name] = snap.categories[name][code] if code is not None else CATEGORICAL[name]
+        for filters in (cohort, {"goal": cohort["goal"]}):
+            mask = self._mask(snap, **filters)
+            peers = int(np.count_nonzero(mask))
+            if peers >= min_peers:
+                break
+        else:
+            return None
+        h_low, h_high, h_mid = _histograms(None, 1, snap.columns["salary_low"][mask], snap.columns["salary_high"][mask])
+        # Midpoint bins are half a salary bin wide: bin b holds (low + high) == b
+        mine = min(int(round(sum(parsed) * SALARY_SCALE)), 2 * SALARY_BINS - 1)
+        below = int(h_mid[0, :mine].sum()) + 0.5 * int(h_mid[0, mine])
+        listed = snap.columns["roles"][mask].ravel()
+        role_counts = np.bincount(listed[listed != NO_ROLE], minlength=len(snap.categories["roles"]))
+        return {
+            "peers": peers,
+            "cohort": filters,
+            "salary_range": [round(parsed[0], 2), round(parsed[1], 2)],
+            "percentile": round(below / peers * 100, 1),
+            "peer_median_range": [_percentiles(h_low[0], (50,), 1 / SALARY_SCALE)[0], _percentiles(h_high[0], (50,), 1 / SALARY_SCALE)[0]],
+            "top_roles": [snap.categories["roles"][c] for c in _top_codes(role_counts, 3)],
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows": self.snapshot().rows, "written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+
+def _top_codes(counts: np.ndarray, top: int) -> List[int]:
+    present = np.flatnonzero(counts)
+    return [int(c) for c in present[np.argsort(-counts[present], kind="stable")][:top]]
+
+
+def _keep(counts: np.ndarray, top: int, size: Optional[int] = None) -> Tuple[List[int], np.ndarray]:
+    """The top codes, and a lookup from every code to its group: 0..len(kept)-1, or len(kept) for the rest."""
+    kept = _top_codes(counts, top)
+    number = np.full(size or max(len(counts), 1), len(kept), dtype=np.intp)
+    number[kept] = np.arange(len(kept))
+    return kept, number
+
+
+# _BYTE_BITS[b, v] is bit b of the byte value v
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").T.astype(np.float64)
+
+
+def _histograms(groups: Optional[np.ndarray], n_groups: int, low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Per-group counts of salary bins, one bincount pass each: (n_groups,
+    SALARY_BINS) for the low and high ends, (n_groups, 2 * SALARY_BINS) for
+    the midpoint, whose bin is low + high. Stored salaries are already
+    clipped to the top bin.
+    """
+    mid = low + high  # at most 2 * SALARY_BINS - 2, no uint16 overflow
+    if groups is None:
+        keys = (low, high, mid)
+    else:
+        offset = groups.astype(np.intp)
+        offset *= SALARY_BINS
+        keys = (offset + low, offset + high, 2 * offset + mid)
+    return tuple(
+        np.bincount(key, minlength=n_groups * bins).reshape(n_groups, bins).astype(np.float64)
+        for key, bins in zip(keys, (SALARY_BINS, SALARY_BINS, 2 * SALARY_BINS))
+    )
+
+
+def _percentiles(histogram: np.ndarray, percentiles: Sequence[float], width: float) -> List[float]:
+    """np.percentile's linear interpolation, read off a histogram of bins `width` wide."""
+    cumulative = np.cumsum(histogram)
+    ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (cumulative[-1] - 1)
+    below = np.searchsorted(cumulative, np.floor(ranks), side="right")
+    above = np.searchsorted(cumulative, np.ceil(ranks), side="right")
+    return [round(float(v) * width, 2) for v in below + (above - below) * (ranks - np.floor(ranks))]
+
+
+def _summary(histograms: Sequence[np.ndarray], percentiles: Sequence[float]) -> Dict[str, Any]:
+    h_low, h_high, h_mid = histograms
+    count = int(h_low.sum())
+    if not count:
+        return {"count": 0}
+    return {
+        "count": count,
+        **{
+            column: {f"p{q:g}": value for q, value in zip(percentiles, _percentiles(histogram, percentiles, width))}
+            for column, histogram, width in (
+                ("low", h_low, 1 / SALARY_SCALE),
+                ("high", h_high, 1 / SALARY_SCALE),
+                ("mid", h_mid, 1 / (2 * SALARY_SCALE)),
+            )
+        },
+    }
+
+
+_index: Optional[SalaryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_salary_index() -> Optional[SalaryIndex]:
+    """
+    Returns the process-wide index at SALARY_INDEX_PATH, or None when it is 'off'.
+    """
+    global _index
+    path = os.getenv("SALARY_INDEX_PATH", DEFAULT_PATH)
+    if path.lower() in ("", "0", "off", "none"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SalaryIndex(path)
+    return _index
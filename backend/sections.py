@@ -0,0 +1,85 @@
+"""
+Parsing of the plain-text report into its named sections.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REQUIRED_SECTIONS = [
+    "Estimated Salary Range",
+    "Roles They Can Aim For",
+    "Skills They're Missing",
+    "Suggested Learning Tracks",
+    "ROI of Upskilling",
+]
+
+
+def _is_header(line: str) -> bool:
+    return line.endswith(":") and len(line) < 40
+
+
+def parse_sections(report: str) -> Dict[str, str]:
+    """
+    Split a full report into {header: body}. Any short line ending in ':' starts a section.
+    """
+    sections: Dict[str, str] = {}
+    current_section = None
+    for line in report.splitlines():
+        line = line.strip()
+        if not line or line == '---':
+            continue
+        if _is_header(line):
+            current_section = line[:-1]
+            sections[current_section] = ""
+        elif current_section:
+            sections[current_section] += line + "\n"
+    return sections
+
+
+def missing_sections(sections: Dict[str, str]) -> List[str]:
+    return [k for k in REQUIRED_SECTIONS if k not in sections or not sections[k].strip()]
+
+
+class SectionStream:
+    """
+    Incremental parser for a streamed report.
+
+    Feed text deltas as they arrive; a section is yielded as soon as it is
+    complete, i.e. when the next header (or the closing '---') is seen.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._buffer = ""
+        self._current: Optional[str] = None
+        self._body: List[str] = []
+
+    def feed(self, delta: str) -> Iterator[Tuple[str, str]]:
+        self.text += delta
+        self._buffer += delta
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            yield from self._line(line.strip())
+
+    def close(self) -> Iterator[Tuple[str, str]]:
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            yield from self._line(line.strip())
+        yield from self._flush()
+
+    def _line(self, line: str) -> Iterator[Tuple[str, str]]:
+        if not line:
+            return
+        if line == '---':
+            yield from self._flush()
+        elif _is_header(line):
+            yield from self._flush()
+            self._current = line[:-1]
+        elif self._current:
+            self._body.append(line)
+
+    def _flush(self) -> Iterator[Tuple[str, str]]:
+        name, body = self._current, "\n".join(self._body)
+        self._current, self._body = None, []
+        # Skip sections whose body never arrived
+        if name is not None and body:
+            yield name, body
@@ -0,0 +1,145 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers with the same key share one upstream call: the first
+caller (the leader) runs it and everyone who arrives while it is in flight
+waits for and receives the same result.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+def prompt_key(prompt: str, model: str, params: dict) -> str:
+    """
+    Hash of everything that determines the upstream completion.
+    """
+    payload = json.dumps(
+        {"prompt": prompt, "model": model, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Thread-based single-flight group, for sync callers (threadpool, Streamlit sessions).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Tuple[_Call, bool]:
+        """
+        Returns (call, is_leader). The leader must call finish() when done.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key: str, call: _Call, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result, call.error = result, error
+        call.done.set()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        call, leader = self.join(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio single-flight group, for the async FastAPI endpoints.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """
+        Returns (future, is_leader). The leader must call finish() when done.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future, False
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        return future, True
+
+    def finish(self, key: str, future: asyncio.Future, result: Any = None, error: BaseException = None) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            # Nobody may be waiting; don't log "exception was never retrieved"
+            future.exception()
+        else:
+            future.set_result(result)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() shared with every concurrent caller for key. The call runs
+        as its own task and each caller awaits it shielded, so a cancelled
+        caller, the leader included, leaves it running for the others.
+        """
+        future, leader = self.join(key)
+        if leader:
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._settle(key, future, t))
+        return await asyncio.shield(future)
+
+    def _settle(self, key: str, future: asyncio.Future, task: asyncio.Task) -> None:
+        if task.cancelled():
+            # Only happens at loop shutdown; followers get an error they can handle
+            self.finish(key, future, error=RuntimeError("coalesced call was cancelled"))
+        elif task.exception() is not None:
+            self.finish(key, future, error=task.exception())
+        else:
+            self.finish(key, future, task.result())
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
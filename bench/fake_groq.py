@@ -0,0 +1,231 @@
+"""
+Local OpenAI-compatible stand-in for the Groq chat completions API.
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls), so
+the backend can be pointed at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python bench/fake_groq.py --port 9100 --latency-ms 800 --latency-sigma 0.4 \
+        --tokens-per-sec 250 --error-rate 0.01 --rate-limit-rate 0.02
+
+--rpm / --tpm enforce account-style per-minute budgets: requests over budget
+get a 429 with retry-after, and every response carries x-ratelimit-* headers.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPORT = """---
+Estimated Salary Range:
+₹6–10 LPA
+
+Roles They Can Aim For:
+Data Analyst
+Business Analyst
+
+Skills They're Missing:
+SQL
+Power BI
+Statistics
+
+Suggested Learning Tracks:
+1. NxtWave Data Analytics Course
+2. Statistics for data analysis
+3. Power BI dashboards
+
+ROI of Upskilling:
+Increase salary by 80% in 6 months
+---"""
+
+STRUCTURED = {
+    "salary_range": "₹6–10 LPA",
+    "roles": ["Data Analyst", "Business Analyst"],
+    "missing_skills": ["SQL", "Power BI", "Statistics"],
+    "learning_tracks": ["NxtWave Data Analytics Course", "Statistics for data analysis", "Power BI dashboards"],
+    "roi": "Increase salary by 80% in 6 months",
+}
+
+
+class Settings:
+    latency_ms = 800.0
+    latency_sigma = 0.4
+    tokens_per_sec = 250.0
+    error_rate = 0.0
+    rate_limit_rate = 0.0
+    retry_after = 1
+    rpm = 0.0
+    tpm = 0.0
+
+
+settings = Settings()
+app = FastAPI()
+counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+class Budget:
+    """Per-minute budget refilled continuously, like Groq's limits; 0 means unlimited."""
+
+    def __init__(self) -> None:
+        self.level = None
+        self.updated = time.monotonic()
+
+    def refill(self, per_minute: float) -> float:
+        now = time.monotonic()
+        if self.level is None:
+            self.level = per_minute
+        self.level = min(per_minute, self.level + (now - self.updated) * per_minute / 60)
+        self.updated = now
+        return self.level
+
+    def reset_in(self, per_minute: float, amount: float) -> float:
+        return max(0.0, (amount - self.level) * 60 / per_minute)
+
+
+request_budget = Budget()
+token_budget = Budget()
+
+
+def _admit(tokens: int) -> tuple:
+    """Charge the per-minute budgets. Returns (allowed, headers)."""
+    headers = {}
+    wait = 0.0
+    if settings.rpm:
+        request_budget.refill(settings.rpm)
+        wait = max(wait, request_budget.reset_in(settings.rpm, 1))
+        headers["x-ratelimit-limit-requests"] = str(int(settings.rpm))
+    if settings.tpm:
+        token_budget.refill(settings.tpm)
+        wait = max(wait, token_budget.reset_in(settings.tpm, tokens))
+        headers["x-ratelimit-limit-tokens"] = str(int(settings.tpm))
+    allowed = wait == 0
+    if allowed:
+        if settings.rpm:
+            request_budget.level -= 1
+        if settings.tpm:
+            token_budget.level -= tokens
+    if settings.rpm:
+        headers["x-ratelimit-remaining-requests"] = str(max(0, int(request_budget.level)))
+        headers["x-ratelimit-reset-requests"] = f"{request_budget.reset_in(settings.rpm, settings.rpm):.2f}s"
+    if settings.tpm:
+        headers["x-ratelimit-remaining-tokens"] = str(max(0, int(token_budget.level)))
+        headers["x-ratelimit-reset-tokens"] = f"{token_budget.reset_in(settings.tpm, settings.tpm):.2f}s"
+    if not allowed:
+        headers["retry-after"] = str(max(1, round(wait)))
+    return allowed, headers
+
+
+def _latency() -> float:
+    # Log-normal around the configured median, like real completion latencies
+    return settings.latency_ms / 1000 * math.exp(random.gauss(0, settings.latency_sigma))
+
+
+def _tokens(text: str) -> list:
+    # Roughly 4 characters per token
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def _usage(prompt_chars: int, content: str) -> dict:
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(_tokens(content))
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    roll = random.random()
+    if roll < settings.rate_limit_rate:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            headers={"retry-after": str(settings.retry_after), "x-ratelimit-remaining-requests": "0"},
+        )
+    if roll < settings.rate_limit_rate + settings.error_rate:
+        counters["errors"] += 1
+        return JSONResponse(status_code=500, content={"error": {"message": "Internal server error", "type": "internal_server_error"}})
+
+    structured = (body.get("response_format") or {}).get("type") == "json_object"
+    content = json.dumps(STRUCTURED, ensure_ascii=False) if structured else REPORT
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    # Groq counts the prompt plus max_completion_tokens against the TPM budget
+    allowed, limit_headers = _admit(prompt_chars // 4 + int(body.get("max_completion_tokens") or 0))
+    if not allowed:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            headers=limit_headers,
+        )
+    model = body.get("model", "fake")
+    created = int(time.time())
+    # Time to first token, then generation at tokens_per_sec
+    ttft = _latency()
+
+    if not body.get("stream"):
+        await asyncio.sleep(ttft + len(_tokens(content)) / settings.tokens_per_sec)
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": _usage(prompt_chars, content),
+        }, headers=limit_headers)
+
+    async def events():
+        await asyncio.sleep(ttft)
+        for token in _tokens(content):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(1 / settings.tokens_per_sec)
+        final = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": _usage(prompt_chars, content)},
+        }
+        yield f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=limit_headers)
+
+
+@app.get("/stats")
+def stats() -> dict:
+    return counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Groq (OpenAI-compatible) server for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=settings.latency_ms, help="median time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=settings.latency_sigma, help="log-normal spread of latency")
+    parser.add_argument("--tokens-per-sec", type=float, default=settings.tokens_per_sec)
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=settings.rate_limit_rate, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=settings.retry_after)
+    parser.add_argument("--rpm", type=float, default=settings.rpm, help="requests per minute budget (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=settings.tpm, help="tokens per minute budget (0 = unlimited)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    for name in ("latency_ms", "latency_sigma", "tokens_per_sec", "error_rate", "rate_limit_rate", "retry_after", "rpm", "tpm"):
+        setattr(settings, name, getattr(args, name))
+    if args.seed is not None:
+        random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
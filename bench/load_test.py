@@ -0,0 +1,330 @@
+"""
+Load and latency benchmark for the backend API.
+
+Drives /recommend and its siblings at a fixed concurrency and reports
+throughput, p50/p95/p99 latency, time to first section (streaming) and
+backend memory per in-flight request. Results are written as JSON so runs
+can be compared between commits.
+
+Self-contained run against the local fake Groq server:
+    python bench/load_test.py --spawn --scenarios recommend,stream,estimate \
+        --concurrency 50 --requests 500 --output bench/results.json
+
+Against an already running backend:
+    python bench/load_test.py --target http://127.0.0.1:8000 --backend-pid 1234
+
+Compare with an earlier run:
+    python bench/load_test.py --spawn --compare bench/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "recommend": ("POST", "/recommend"),
+    "sync": ("POST", "/recommend/sync"),
+    "estimate": ("POST", "/recommend?tier=estimate"),
+    "stream": ("POST", "/recommend/stream"),
+    "batch": ("POST", "/recommend/batch"),
+    "jobs": ("POST", "/recommend/jobs"),
+}
+
+GOALS = ["Software Developer", "Data Analyst", "QA/Automation Tester", "Full Stack Developer", "Other"]
+
+
+def make_profile(i: int, unique: bool) -> dict:
+    return {
+        "education": "Bachelor's Degree",
+        # A unique free-text field defeats caching and coalescing
+        "experience": f"bench run {i}" if unique else "No experience",
+        "tech_knowledge": ["Python", "SQL"],
+        "interests": "Data Analytics",
+        "goal": GOALS[i % len(GOALS)],
+        "companies": "",
+        "learning_style": "Hybrid",
+        "time_commitment": 10,
+        "other_constraints": "",
+    }
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (k - lo), 2)
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class MemorySampler:
+    def __init__(self, pid: Optional[int], interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.baseline = read_rss_kb(pid) if pid else None
+        self.peak = self.baseline
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            rss = read_rss_kb(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.pid:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def one_request(client: httpx.AsyncClient, scenario: str, i: int, args) -> dict:
+    method, path = SCENARIOS[scenario]
+    started = time.perf_counter()
+    ttft = None
+    degraded = False
+    try:
+        if scenario == "stream":
+            async with client.stream(method, path, json=make_profile(i, args.unique)) as r:
+                status = r.status_code
+                async for line in r.aiter_lines():
+                    if ttft is None and line.startswith('{"type": "section"'):
+                        ttft = time.perf_counter() - started
+        elif scenario == "jobs":
+            r = await client.post(path, json=make_profile(i, args.unique))
+            status = r.status_code
+            if status == 202:
+                # Long-poll until the job finishes
+                url = r.headers["location"]
+                job = {"status": "queued"}
+                while job["status"] in ("queued", "running"):
+                    job = (await client.get(url, params={"wait": 30})).json()
+                status = 200 if job["status"] == "done" else job["status"]
+                degraded = bool(job.get("result", {}).get("degraded"))
+        elif scenario == "batch":
+            body = "\n".join(json.dumps(make_profile(i * args.batch_size + j, args.unique)) for j in range(args.batch_size))
+            r = await client.post(path, content=body, params={"concurrency": args.batch_concurrency})
+            status = r.status_code
+        else:
+            r = await client.post(path, json=make_profile(i, args.unique))
+            status = r.status_code
+            if status == 200:
+                degraded = bool(r.json().get("degraded"))
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    latency = time.perf_counter() - started
+    return {"status": status, "latency": latency, "ttft": ttft, "degraded": degraded}
+
+
+async def run_scenario(scenario: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    results: List[dict] = []
+    counter = iter(range(args.requests))
+    sampler = MemorySampler(args.backend_pid)
+
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=timeout) as client:
+        async def worker() -> None:
+            for i in counter:
+                results.append(await one_request(client, scenario, i, args))
+
+        sampler.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        await sampler.stop()
+
+    ok = [r for r in results if r["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    latencies = [r["latency"] * 1000 for r in ok]
+    ttfts = [r["ttft"] * 1000 for r in ok if r["ttft"] is not None]
+    summary = {
+        "requests": len(results),
+        "ok": len(ok),
+        "degraded": sum(r["degraded"] for r in ok),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "latency_ms": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95), "p99": percentile(latencies, 0.99)},
+        "ttft_ms": {"p50": percentile(ttfts, 0.5), "p95": percentile(ttfts, 0.95), "p99": percentile(ttfts, 0.99)},
+    }
+    if sampler.baseline is not None and sampler.peak is not None:
+        summary["rss_baseline_kb"] = sampler.baseline
+        summary["rss_peak_kb"] = sampler.peak
+        summary["rss_per_in_flight_kb"] = round((sampler.peak - sampler.baseline) / args.concurrency, 1)
+    return summary
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def bench_state_env(state_dir: str) -> Dict[str, str]:
+    """
+    Points a benchmark backend's salary index, cohort index and job store
+    at state_dir, so reports from the fake Groq server never reach the real
+    ones in backend/.cache.
+    """
+    return {
+        "SALARY_INDEX_PATH": os.path.join(state_dir, "salaries"),
+        "COHORT_INDEX_PATH": os.path.join(state_dir, "cohorts.idx"),
+        "JOB_STORE_PATH": os.path.join(state_dir, "jobs.sqlite3"),
+    }
+
+
+def spawn(args, state_dir: str) -> List[subprocess.Popen]:
+    """
+    Start the fake Groq server and a backend pointed at it, keeping its
+    state in state_dir.
+    """
+    fake_port = args.fake_port
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "bench", "fake_groq.py"),
+        "--port", str(fake_port),
+        "--latency-ms", str(args.latency_ms),
+        "--latency-sigma", str(args.latency_sigma),
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--rpm", str(args.rpm),
+        "--tpm", str(args.tpm),
+    ])
+    env = dict(
+        os.environ,
+        GROQCLOUD_API_KEY="fake-key",
+        GROQ_BASE_URL=f"http://127.0.0.1:{fake_port}",
+        LLM_CACHE_PATH="off",
+        **bench_state_env(state_dir),
+        # Explicit, so the suite measures the server and not a client-side budget left in the environment
+        GROQ_RPM=str(args.client_rpm),
+        GROQ_TPM=str(args.client_tpm),
+    )
+    port = httpx.URL(args.target).port or 8000
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.join(ROOT, "backend"),
+        env=env,
+    )
+    wait_for(f"http://127.0.0.1:{fake_port}/stats")
+    wait_for(args.target.rstrip("/") + "/health")
+    args.backend_pid = args.backend_pid or backend.pid
+    return [backend, fake]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> None:
+    for scenario, summary in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        print(f"{scenario}:")
+        for metric in ("p50", "p95", "p99"):
+            a, b = before["latency_ms"].get(metric), summary["latency_ms"].get(metric)
+            if a and b:
+                print(f"  latency {metric}: {a} -> {b} ms ({(b - a) / a * 100:+.1f}%)")
+        a, b = before.get("throughput_rps"), summary.get("throughput_rps")
+        if a and b:
+            print(f"  throughput: {a} -> {b} rps ({(b - a) / a * 100:+.1f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the Career & Salary Estimator API.")
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default="recommend,stream", help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--same-profile", dest="unique", action="store_false", help="send identical profiles (exercises caches)")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--batch-concurrency", type=int, default=8)
+    parser.add_argument("--backend-pid", type=int, help="sample this process's RSS")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench", "results.json"))
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    spawn_opts = parser.add_argument_group("--spawn: run a local backend against the fake Groq server")
+    spawn_opts.add_argument("--spawn", action="store_true")
+    spawn_opts.add_argument("--fake-port", type=int, default=9100)
+    spawn_opts.add_argument("--latency-ms", type=float, default=800.0)
+    spawn_opts.add_argument("--latency-sigma", type=float, default=0.4)
+    spawn_opts.add_argument("--tokens-per-sec", type=float, default=250.0)
+    spawn_opts.add_argument("--error-rate", type=float, default=0.0)
+    spawn_opts.add_argument("--rate-limit-rate", type=float, default=0.0)
+    spawn_opts.add_argument("--rpm", type=float, default=0.0, help="fake account requests/minute (0 = unlimited)")
+    spawn_opts.add_argument("--tpm", type=float, default=0.0, help="fake account tokens/minute (0 = unlimited)")
+    spawn_opts.add_argument("--client-rpm", type=float, default=0.0, help="backend's GROQ_RPM budget (0 = unlimited)")
+    spawn_opts.add_argument("--client-tpm", type=float, default=0.0, help="backend's GROQ_TPM budget (0 = unlimited)")
+    args = parser.parse_args()
+
+    state = tempfile.TemporaryDirectory(prefix="load-test-")
+    procs = spawn(args, state.name) if args.spawn else []
+    try:
+        scenarios = {}
+        for scenario in args.scenarios.split(","):
+            scenario = scenario.strip()
+            scenarios[scenario] = asyncio.run(run_scenario(scenario, args))
+            print(scenario, json.dumps(scenarios[scenario]))
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        state.cleanup()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Query benchmark for the salary analytics index (backend/salary_index.py).
+
+Fills a scratch index with synthetic rows, written column by column with
+NumPy rather than parsed from reports, then times the /stats/salaries and
+peer-comparison queries against it:
+    python bench/salary_queries.py --rows 5000000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from load_test import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+from salary_index import COLUMNS, MAX_ROLES, NO_ROLE, SALARY_SCALE, SalaryIndex  # noqa: E402
+
+
+def fill(index: SalaryIndex, rows: int, roles: int, seed: int = 0) -> None:
+    """Writes `rows` synthetic rows with `roles` distinct role titles."""
+    rng = np.random.default_rng(seed)
+    categories = index._load_categories()
+    categories["roles"] = [f"Role {i}" for i in range(roles)]
+    index._save_categories(categories)
+    low = rng.lognormal(np.log(5), 0.4, rows)
+    # One to four skills per report, as the form's multiselect is used
+    n_skills = min(len(categories["skills"]), 32)
+    skills = np.zeros(rows, dtype=np.uint32)
+    for _ in range(4):
+        skills |= np.where(rng.random(rows) < 0.6, 1 << rng.integers(0, n_skills, rows), 0).astype(np.uint32)
+    skills[skills == 0] = 1 << rng.integers(0, n_skills, int(np.count_nonzero(skills == 0)))
+    role_codes = rng.integers(0, roles, (rows, MAX_ROLES)).astype(np.uint16)
+    role_codes[rng.random(rows) < 0.2, MAX_ROLES - 1] = NO_ROLE
+    columns = {
+        "ts": rng.integers(time.time() - 90 * 86400, time.time(), rows),
+        "education": rng.integers(0, len(categories["education"]), rows),
+        "goal": rng.integers(0, len(categories["goal"]), rows),
+        "learning_style": rng.integers(0, len(categories["learning_style"]), rows),
+        "hours": rng.integers(1, 41, rows),
+        "skills": skills,
+        "salary_low": np.round(low * SALARY_SCALE),
+        "salary_high": np.round(low * rng.uniform(1.3, 2.0, rows) * SALARY_SCALE),
+        "roles": role_codes,
+    }
+    for name, dtype in COLUMNS.items():
+        with open(index._path(f"{name}.col"), "wb") as f:
+            f.write(np.asarray(columns[name], dtype=dtype.base).tobytes())
+
+
+def timed(query: Callable[[], object], repeat: int) -> Dict[str, float]:
+    query()  # fault the pages in once
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query()
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(float(np.median(samples)) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time salary index queries over synthetic rows.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--roles", type=int, default=500, help="distinct role titles")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        index = SalaryIndex(directory)
+        started = time.perf_counter()
+        fill(index, args.rows, args.roles)
+        print(f"wrote {args.rows} rows in {time.perf_counter() - started:.1f}s "
+              f"({sum(os.path.getsize(index._path(f'{n}.col')) for n in COLUMNS) / 1e6:.0f} MB)")
+        profile = {"goal": "Data Analyst", "education": "Bachelor's Degree"}
+        queries = {
+            "overall": lambda: index.salary_stats(),
+            "by_goal": lambda: index.salary_stats(group_by="goal"),
+            "by_education_for_goal": lambda: index.salary_stats(group_by="education", goal="Data Analyst"),
+            "by_skill": lambda: index.salary_stats(group_by="skill"),
+            "by_role_top20": lambda: index.salary_stats(group_by="role", top=20),
+            "skills_filter": lambda: index.salary_stats(skills=["Python", "SQL"]),
+            "peer_compare": lambda: index.compare(profile, "₹6–10 LPA"),
+        }
+        print(json.dumps({name: timed(query, args.repeat) for name, query in queries.items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Cold-start benchmark.
+
+Every sample runs in a fresh process, so nothing is warm but the OS page
+cache:
+    import     time to `import main` (the backend app), plus the slowest
+               modules from -X importtime with --top
+    health     spawn of `uvicorn main:app` to its first 200 on GET /health,
+               then the latency of the first estimate request
+    streamlit  spawn of `streamlit run app.py` to /_stcore/health, and the
+               first script run (first render) of app.py
+
+    python bench/startup.py --runs 5
+    python bench/startup.py --only import --top 15
+    python bench/startup.py --output bench/startup.json
+
+No Groq calls are made; the key and base URL are placeholders.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from load_test import ROOT, bench_state_env, git_commit, make_profile
+
+BACKEND_DIR = os.path.join(ROOT, "backend")
+
+ENV = dict(
+    os.environ,
+    GROQCLOUD_API_KEY="startup-bench",
+    GROQ_BASE_URL="http://127.0.0.1:9",
+)
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+# The first run of app.py, in a process that has already imported Streamlit itself
+FIRST_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+t = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+print(json.dumps({"seconds": time.perf_counter() - t, "exception": [str(e.value) for e in at.exception]}))
+"""
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def poll(url: str, timeout: float, interval: float = 0.005) -> float:
+    """Seconds until `url` answers 200, polling every `interval`."""
+    started = time.perf_counter()
+    with httpx.Client(timeout=1.0) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                if client.get(url).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(interval)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def bench_import(args) -> Dict[str, object]:
+    samples = [
+        float(subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=ENV, text=True))
+        for _ in range(args.runs)
+    ]
+    result: Dict[str, object] = {"import_main": summarize(samples)}
+    if args.top:
+        trace = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=BACKEND_DIR, env=ENV, capture_output=True, text=True, check=True,
+        ).stderr
+        modules = []
+        for line in trace.splitlines()[1:]:
+            if not line.startswith("import time:"):
+                continue
+            _, own, cumulative, name = (part.strip() for part in line.replace("|", ":", 2).split(":", 3))
+            modules.append((int(cumulative), int(own), name))
+        result["slowest_modules"] = [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for cumulative, own, name in sorted(modules, reverse=True)[:args.top]
+        ]
+    return result
+
+
+def bench_health(args) -> Dict[str, object]:
+    base = f"http://127.0.0.1:{args.backend_port}"
+    ready, first_estimate = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        backend = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.backend_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=ENV,
+        )
+        try:
+            poll(f"{base}/health", args.timeout)
+            ready.append(time.perf_counter() - started)
+            sent = time.perf_counter()
+            httpx.post(f"{base}/recommend?tier=estimate", json=make_profile(0, False), timeout=args.timeout).raise_for_status()
+            first_estimate.append(time.perf_counter() - sent)
+        finally:
+            stop(backend)
+    return {"time_to_health": summarize(ready), "first_estimate": summarize(first_estimate)}
+
+
+def bench_streamlit(args) -> Dict[str, object]:
+    ready, render = [], []
+    app = os.path.join(ROOT, "app.py")
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+                "--server.port", str(args.streamlit_port), "--browser.gatherUsageStats", "false",
+            ],
+            cwd=ROOT, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            poll(f"http://127.0.0.1:{args.streamlit_port}/_stcore/health", args.timeout)
+            ready.append(time.perf_counter() - started)
+        finally:
+            stop(server)
+        run = json.loads(subprocess.check_output([sys.executable, "-c", FIRST_RENDER_SNIPPET, app], cwd=ROOT, env=ENV, text=True))
+        if run["exception"]:
+            raise RuntimeError(f"app.py raised on its first run: {run['exception']}")
+        render.append(run["seconds"])
+    return {"time_to_health": summarize(ready), "first_render": summarize(render)}
+
+
+BENCHMARKS: Dict[str, Callable] = {"import": bench_import, "health": bench_health, "streamlit": bench_streamlit}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure cold-start times of the backend and the Streamlit app.")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"comma-separated: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest modules imported by main")
+    parser.add_argument("--backend-port", type=int, default=8765)
+    parser.add_argument("--streamlit-port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    results: Dict[str, object] = {"commit": git_commit(), "runs": args.runs}
+    # bench_health posts real /recommend requests; keep what they record out of backend/.cache
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as state_dir:
+        ENV.update(bench_state_env(state_dir))
+        for name in args.only.split(","):
+            results[name] = BENCHMARKS[name](args)
+            print(name, json.dumps(results[name]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Download the logo and IBM Plex Mono into static/ for self-hosting.
+
+Usage:
+    python fetch_assets.py            # fetch whatever is missing
+    python fetch_assets.py --force    # refresh everything
+
+Run it once at build time (image build, devcontainer setup) and commit or
+bake in the result: app.py then loads both from its own origin, so first
+paint waits on no third-party host and the page works offline. Only the
+Latin subset of the 400 and 700 weights is kept, the two faces the page
+uses. IBM Plex is licensed under the SIL Open Font License 1.1. Until
+the files are fetched, app.py links LOGO_URL and FONT_CSS_URL instead.
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+LOGO_URL = "https://nxtwave.imgix.net/ccbp-website/ccbp_logo.png"
+FONT_CSS_URL = "https://fonts.googleapis.com/css2?family=IBM+Plex+Mono:wght@400;700&display=swap"
+# Google Fonts picks the format by user agent; this one gets woff2
+WOFF2_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+FONT_FILES = {"400": "fonts/IBMPlexMono-Regular.woff2", "700": "fonts/IBMPlexMono-Bold.woff2"}
+
+_FACE = re.compile(r"/\*\s*(?P<subset>[\w-]+)\s*\*/\s*@font-face\s*{(?P<body>[^}]*)}")
+
+
+def latin_font_urls(css: str) -> Dict[str, str]:
+    """{weight: woff2 URL} of the Latin @font-face rules in a Google Fonts stylesheet."""
+    urls = {}
+    for face in _FACE.finditer(css):
+        if face.group("subset") != "latin":
+            continue
+        weight = re.search(r"font-weight:\s*(\d+)", face.group("body"))
+        src = re.search(r"url\((\S+?)\)\s*format\('woff2'\)", face.group("body"))
+        if weight and src:
+            urls[weight.group(1)] = src.group(1)
+    return urls
+
+
+def _download(session: "requests.Session", url: str, name: str) -> str:
+    path = os.path.join(STATIC_DIR, name)
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp, path)
+    return path
+
+
+def fetch(force: bool = False) -> List[str]:
+    """Downloads the missing (or, with force, all) assets; returns the paths written."""
+    # Imported here: app.py reads the URLs above without loading requests
+    import requests
+
+    def wanted(name: str) -> bool:
+        return force or not os.path.exists(os.path.join(STATIC_DIR, name))
+
+    written = []
+    with requests.Session() as session:
+        if wanted("logo.png"):
+            written.append(_download(session, LOGO_URL, "logo.png"))
+        if any(wanted(name) for name in FONT_FILES.values()):
+            css = session.get(FONT_CSS_URL, headers={"User-Agent": WOFF2_USER_AGENT}, timeout=30)
+            css.raise_for_status()
+            urls = latin_font_urls(css.text)
+            for weight, name in FONT_FILES.items():
+                if weight not in urls:
+                    raise RuntimeError(f"no Latin woff2 for weight {weight} in {FONT_CSS_URL}")
+                if wanted(name):
+                    written.append(_download(session, urls[weight], name))
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Download the logo and font that app.py serves from static/.")
+    parser.add_argument("--force", action="store_true", help="download again even if the files exist")
+    args = parser.parse_args(argv)
+    import requests
+    try:
+        written = fetch(args.force)
+    except (requests.RequestException, RuntimeError) as e:
+        sys.exit(f"could not fetch assets: {e}")
+    for path in written:
+        print(f"wrote {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from rate_scheduler import RateScheduler
+
+GROQ_HEADERS = {
+    "x-ratelimit-limit-requests": "1000",
+    "x-ratelimit-remaining-requests": "999",
+    "x-ratelimit-limit-tokens": "30000",
+    "x-ratelimit-remaining-tokens": "29258",
+}
+
+
+def test_unlimited_bucket_does_not_throttle_after_observe():
+    scheduler = RateScheduler()
+    scheduler.release(scheduler.acquire(742))
+    scheduler.observe(GROQ_HEADERS)
+
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire(742))
+    assert time.monotonic() - started < 0.1
+
+
+def test_unlimited_bucket_adopts_token_limit_but_not_daily_requests():
+    scheduler = RateScheduler()
+    scheduler.observe(GROQ_HEADERS)
+
+    assert scheduler.tokens.capacity == 30000
+    assert scheduler.tokens.level == 29258
+    assert scheduler.requests.capacity <= 0
+
+
+def test_configured_budget_is_never_raised():
+    scheduler = RateScheduler(rpm=30, tpm=6000)
+    scheduler.observe(GROQ_HEADERS)
+
+    assert scheduler.requests.capacity == 30
+    assert scheduler.tokens.capacity == 6000
+    assert scheduler.tokens.level <= 6000